@@ -3,9 +3,12 @@
 API Validator - Checks API endpoints for best practices.
 Validates OpenAPI specs, response formats, and common issues.
 """
+import os
 import sys
 import json
 import re
+import argparse
+import subprocess
 from pathlib import Path
 
 # Fix Windows console encoding for Unicode output
@@ -15,24 +18,90 @@ try:
 except AttributeError:
     pass  # Python < 3.7
 
-def find_api_files(project_path: Path) -> list:
-    """Find API-related files."""
-    patterns = [
-        "**/*api*.ts", "**/*api*.js", "**/*api*.py",
-        "**/routes/*.ts", "**/routes/*.js", "**/routes/*.py",
-        "**/controllers/*.ts", "**/controllers/*.js",
-        "**/endpoints/*.ts", "**/endpoints/*.py",
-        "**/*.openapi.json", "**/*.openapi.yaml",
-        "**/swagger.json", "**/swagger.yaml",
-        "**/openapi.json", "**/openapi.yaml"
-    ]
-    
-    files = []
+API_PATTERNS = [
+    "**/*api*.ts", "**/*api*.js", "**/*api*.py",
+    "**/routes/*.ts", "**/routes/*.js", "**/routes/*.py",
+    "**/controllers/*.ts", "**/controllers/*.js",
+    "**/endpoints/*.ts", "**/endpoints/*.py",
+    "**/*.openapi.json", "**/*.openapi.yaml",
+    "**/swagger.json", "**/swagger.yaml",
+    "**/openapi.json", "**/openapi.yaml"
+]
+EXCLUDED = ['node_modules', '.git', 'dist', 'build', '__pycache__']
+
+def compile_patterns(patterns: list):
+    """One regex for all glob patterns over a relative POSIX path; group i+1 is pattern i."""
+    alternatives = []
     for pattern in patterns:
-        files.extend(project_path.glob(pattern))
+        body = re.escape(pattern).replace(r'\*\*/', '(?:.*/)?').replace(r'\*', '[^/]*')
+        alternatives.append(f'({body})')
+    return re.compile('|'.join(alternatives))
+
+API_MATCHER = compile_patterns(API_PATTERNS)
+EXCLUDED_RE = re.compile('|'.join(re.escape(x) for x in EXCLUDED))
+
+def find_api_files(project_path: Path) -> list:
+    """Find API-related files in one pruned walk.
     
-    # Exclude node_modules, etc.
-    return [f for f in files if not any(x in str(f) for x in ['node_modules', '.git', 'dist', 'build', '__pycache__'])]
+    Directories whose name contains an EXCLUDED entry are never entered, and
+    every file is tested once against API_MATCHER. Files are ordered by the
+    first pattern they match, then by path.
+    """
+    found = []
+    stack = [(str(project_path), '')]
+    while stack:
+        abs_dir, rel_dir = stack.pop()
+        try:
+            with os.scandir(abs_dir) as entries:
+                for entry in entries:
+                    rel = rel_dir + entry.name
+                    if EXCLUDED_RE.search(entry.name):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, rel + '/'))
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    m = API_MATCHER.fullmatch(rel)
+                    if m:
+                        found.append((m.lastindex, rel))
+        except OSError:
+            continue
+    found.sort()
+    return [project_path / rel for _, rel in found]
+
+def git_changed_files(project_path: Path, ref: str):
+    """Paths relative to project_path changed since ref, uncommitted and untracked ones included.
+    
+    None when git is unavailable or the ref is unknown.
+    """
+    commands = (
+        ['git', '-C', str(project_path), 'diff', '--name-only', '--no-renames', '--relative', '-z', ref, '--'],
+        ['git', '-C', str(project_path), 'ls-files', '--others', '--exclude-standard', '-z'],
+    )
+    changed = set()
+    for cmd in commands:
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if proc.returncode != 0:
+            return None
+        changed.update(name for name in proc.stdout.split('\0') if name)
+    return sorted(changed)
+
+def changed_api_files(project_path: Path, changed: list) -> list:
+    """The subset of changed paths find_api_files() would pick, without walking the tree."""
+    found = []
+    for name in changed:
+        m = API_MATCHER.fullmatch(name)
+        if m and not EXCLUDED_RE.search(name) and (project_path / name).is_file():
+            found.append((m.lastindex, name))
+    found.sort()
+    return [project_path / name for _, name in found]
 
 def check_openapi_spec(file_path: Path) -> dict:
     """Check OpenAPI/Swagger specification."""
@@ -91,83 +160,136 @@ def check_openapi_spec(file_path: Path) -> dict:
     
     return {'file': str(file_path), 'passed': passed, 'issues': issues, 'type': 'openapi'}
 
-def check_api_code(file_path: Path) -> dict:
-    """Check API code for common issues."""
+# check_api_code rules: (category, patterns, flags). All of them are compiled
+# into API_RULES_RE, one alternation with a named group per category; every
+# pattern starts with a literal (possibly escaped) character.
+API_RULES = [
+    ('error_handling', [r'try\s*{', r'try:', r'\.catch\(', r'except\s+', r'catch\s*\('], 0),
+    ('status_codes', [
+        r'status\s*\(\s*\d{3}\s*\)', r'statusCode\s*[=:]\s*\d{3}',
+        r'HttpStatus\.', r'status_code\s*=\s*\d{3}',
+        r'\.status\(\d{3}\)', r'res\.status\('
+    ], 0),
+    ('validation', [
+        r'validate', r'schema', r'zod', r'joi', r'yup',
+        r'pydantic', r'@Body\(', r'@Query\('
+    ], re.I),
+    ('auth', [
+        r'auth', r'jwt', r'bearer', r'token',
+        r'middleware', r'guard', r'@Authenticated'
+    ], re.I),
+    ('rate_limiting', [r'rateLimit', r'throttle', r'rate.?limit'], re.I),
+    ('logging', [r'console\.log', r'logger\.', r'logging\.', r'log\.'], 0),
+]
+
+def compile_rules(rules: list):
+    """One zero-width alternation: each match is a hit of the category named by lastgroup.
+    
+    Matching inside a lookahead lets the scan advance one character at a
+    time, so a hit nested in another category's hit is still seen. The
+    leading class of the patterns' first characters lets the engine skip
+    every other position without trying the alternatives.
+    """
+    groups = []
+    lead = set()
+    for category, patterns, flags in rules:
+        group = f"(?P<{category}>{'|'.join(patterns)})"
+        groups.append(f'(?i:{group})' if flags & re.I else group)
+        for pattern in patterns:
+            ch = pattern[1] if pattern.startswith('\\') else pattern[0]
+            lead.update((ch.lower(), ch.upper()) if flags & re.I else ch)
+    lead_class = ''.join(re.escape(ch) for ch in sorted(lead))
+    return re.compile(f"(?=[{lead_class}])(?=(?:{'|'.join(groups)}))")
+
+API_RULES_RE = compile_rules(API_RULES)
+
+def scan_api_rules(content: str) -> dict:
+    """{category: [line numbers of its hits]} from one pass over content."""
+    hits = {category: [] for category, _, _ in API_RULES}
+    line = 1
+    last = 0
+    for m in API_RULES_RE.finditer(content):
+        line += content.count('\n', last, m.start())
+        last = m.start()
+        lines = hits[m.lastgroup]
+        if not lines or lines[-1] != line:
+            lines.append(line)
+    return hits
+
+def _lines(lines: list) -> str:
+    shown = ', '.join(map(str, lines[:3]))
+    more = f' +{len(lines) - 3}' if len(lines) > 3 else ''
+    return f"line{'s' if len(lines) > 1 else ''} {shown}{more}"
+
+def report_api_code(file_path: Path, hits: dict) -> dict:
+    """Passed checks and issues of one API code file from its rule hits."""
     issues = []
     passed = []
     
+    # Check for error handling
+    if hits['error_handling']:
+        passed.append(f"[OK] Error handling present ({_lines(hits['error_handling'])})")
+    else:
+        issues.append("[X] No error handling found")
+    
+    # Check for status codes
+    if hits['status_codes']:
+        passed.append(f"[OK] HTTP status codes used ({_lines(hits['status_codes'])})")
+    else:
+        issues.append("[!] No explicit HTTP status codes")
+    
+    # Check for validation
+    if hits['validation']:
+        passed.append(f"[OK] Input validation present ({_lines(hits['validation'])})")
+    else:
+        issues.append("[!] No input validation detected")
+    
+    # Check for auth middleware
+    if hits['auth']:
+        passed.append(f"[OK] Authentication/authorization detected ({_lines(hits['auth'])})")
+    
+    # Check for rate limiting
+    if hits['rate_limiting']:
+        passed.append(f"[OK] Rate limiting present ({_lines(hits['rate_limiting'])})")
+    
+    # Check for logging
+    if hits['logging']:
+        passed.append(f"[OK] Logging present ({_lines(hits['logging'])})")
+    
+    return {'file': str(file_path), 'passed': passed, 'issues': issues, 'type': 'code', 'hits': hits}
+
+def check_api_code(file_path: Path) -> dict:
+    """Check API code for common issues."""
     try:
-        content = file_path.read_text(encoding='utf-8')
-        
-        # Check for error handling
-        error_patterns = [
-            r'try\s*{', r'try:', r'\.catch\(',
-            r'except\s+', r'catch\s*\('
-        ]
-        has_error_handling = any(re.search(p, content) for p in error_patterns)
-        if has_error_handling:
-            passed.append("[OK] Error handling present")
-        else:
-            issues.append("[X] No error handling found")
-        
-        # Check for status codes
-        status_patterns = [
-            r'status\s*\(\s*\d{3}\s*\)', r'statusCode\s*[=:]\s*\d{3}',
-            r'HttpStatus\.', r'status_code\s*=\s*\d{3}',
-            r'\.status\(\d{3}\)', r'res\.status\('
-        ]
-        has_status = any(re.search(p, content) for p in status_patterns)
-        if has_status:
-            passed.append("[OK] HTTP status codes used")
-        else:
-            issues.append("[!] No explicit HTTP status codes")
-        
-        # Check for validation
-        validation_patterns = [
-            r'validate', r'schema', r'zod', r'joi', r'yup',
-            r'pydantic', r'@Body\(', r'@Query\('
-        ]
-        has_validation = any(re.search(p, content, re.I) for p in validation_patterns)
-        if has_validation:
-            passed.append("[OK] Input validation present")
-        else:
-            issues.append("[!] No input validation detected")
-        
-        # Check for auth middleware
-        auth_patterns = [
-            r'auth', r'jwt', r'bearer', r'token',
-            r'middleware', r'guard', r'@Authenticated'
-        ]
-        has_auth = any(re.search(p, content, re.I) for p in auth_patterns)
-        if has_auth:
-            passed.append("[OK] Authentication/authorization detected")
-        
-        # Check for rate limiting
-        rate_patterns = [r'rateLimit', r'throttle', r'rate.?limit']
-        has_rate = any(re.search(p, content, re.I) for p in rate_patterns)
-        if has_rate:
-            passed.append("[OK] Rate limiting present")
-        
-        # Check for logging
-        log_patterns = [r'console\.log', r'logger\.', r'logging\.', r'log\.']
-        has_logging = any(re.search(p, content) for p in log_patterns)
-        if has_logging:
-            passed.append("[OK] Logging present")
-        
+        hits = scan_api_rules(file_path.read_text(encoding='utf-8'))
     except Exception as e:
-        issues.append(f"[X] Read error: {e}")
-    
-    return {'file': str(file_path), 'passed': passed, 'issues': issues, 'type': 'code'}
+        return {'file': str(file_path), 'passed': [], 'issues': [f"[X] Read error: {e}"], 'type': 'code', 'hits': {}}
+    return report_api_code(file_path, hits)
 
 def main():
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    project_path = Path(target)
+    parser = argparse.ArgumentParser(description="Check API endpoints for best practices.")
+    parser.add_argument("target", nargs="?", default=".")
+    parser.add_argument("--since", metavar="REF", help="only check API files changed since REF")
+    args = parser.parse_args()
+    project_path = Path(args.target)
     
     print("\n" + "=" * 60)
     print("  API VALIDATOR - Endpoint Best Practices Check")
     print("=" * 60 + "\n")
     
-    api_files = find_api_files(project_path)
+    api_files = None
+    if args.since:
+        changed = git_changed_files(project_path, args.since)
+        if changed is None:
+            print(f"[!] git could not diff against {args.since}: checking the whole tree")
+        else:
+            api_files = changed_api_files(project_path, changed)
+            print(f"Scope: {len(api_files)} API files among {len(changed)} changed since {args.since}")
+            if not api_files:
+                print("[OK] No API files changed")
+                sys.exit(0)
+    if api_files is None:
+        api_files = find_api_files(project_path)
     
     if not api_files:
         print("[!] No API files found.")
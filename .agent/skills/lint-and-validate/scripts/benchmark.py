@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Performance harness for the .agent skill scripts
+Generates a synthetic repository and times the phases of lint_runner.py,
+type_coverage.py and api_validator.py on it.
+
+Usage:
+    python benchmark.py [options]
+
+    --files N         Files in the synthetic tree (default: 5000; 1k-100k is
+                      the intended range). Roughly half are source (.py, .ts,
+                      .tsx, .js, API routes, OpenAPI specs), half live in
+                      nested node_modules, plus minified bundles under dist/.
+    --bundle-mb MB    Size of each generated dist/ bundle (default: 2).
+    --seed N          Seed of the tree generator (default: 0).
+    --tree DIR        Generate into DIR and keep it; an existing DIR generated
+                      with the same --files/--seed is reused as-is.
+    --repeat N        Timed runs per phase; the minimum is reported (default: 3).
+    --scripts LIST    Comma-separated subset of lint_runner,type_coverage,api_validator.
+    --output FILE     Write the results as JSON (default: print them only).
+    --compare FILE    Compare against an earlier --output file and flag phases
+                      that got slower by more than --threshold percent.
+    --threshold PCT   Regression threshold for --compare (default: 10).
+
+Each phase is timed in-process, without tracing, --repeat times; it is then
+run once more under tracemalloc for its peak Python allocation. Every script
+is also run end-to-end as a subprocess for wall time and peak RSS. The tree
+ships no-op eslint/tsc (node_modules/.bin) and ruff/mypy (.venv/bin) entry
+points, so lint_runner's end-to-end time is its own overhead: detection,
+pruning, resolution, process management and reporting.
+"""
+import sys
+import os
+import json
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+import argparse
+import importlib.util
+import platform
+from pathlib import Path
+
+# Fix Windows console encoding for Unicode output
+try:
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+except AttributeError:
+    pass  # Python < 3.7
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+SCRIPTS = {
+    "lint_runner": SCRIPTS_DIR / "lint_runner.py",
+    "type_coverage": SCRIPTS_DIR / "type_coverage.py",
+    "api_validator": SCRIPTS_DIR.parent.parent / "api-patterns" / "scripts" / "api_validator.py",
+}
+TREE_MARKER = ".benchmark-tree.json"
+FILES_PER_DIR = 16
+END_TO_END_TIMEOUT = 600
+
+# ---------------------------------------------------------------------------
+# Synthetic tree
+# ---------------------------------------------------------------------------
+
+TS_TYPED = "export function typed{i}(a: number, b: string): number {{\n  return a + b.length;\n}}\n"
+TS_UNTYPED = "function untyped{i}(a, b) {{\n  return a || b;\n}}\nconst arrow{i} = (x) => x;\n"
+TS_ANY = "let loose{i}: any = null;\n"
+PY_TYPED = "def typed{i}(a: int, b: str) -> int:\n    return a + len(b)\n\n\n"
+PY_UNTYPED = "def untyped{i}(a, b):\n    return a or b\n\n\n"
+PY_ANY = "loose{i}: Any = None\n"
+JS_BODY = "function helper{i}(a, b) {{\n  return a + b;\n}}\nmodule.exports.helper{i} = helper{i};\n"
+ROUTE_TS = """import {{ Router }} from 'express';
+import {{ z }} from 'zod';
+
+const router = Router();
+const schema{i} = z.object({{ id: z.string() }});
+
+router.get('/items/{i}', authMiddleware, async (req, res) => {{
+  try {{
+    const input = schema{i}.parse(req.query);
+    res.status(200).json({{ id: input.id }});
+  }} catch (err) {{
+    logger.error(err);
+    res.status(400).json({{ error: 'invalid' }});
+  }}
+}});
+
+export default router;
+"""
+ROUTE_PY = """from fastapi import APIRouter
+
+router = APIRouter()
+
+
+@router.get("/items/{i}")
+def read_item_{i}(item_id: str):
+    return {{"id": item_id}}
+"""
+# No-op entry points that lint_runner resolves instead of real linters
+NOOP_TOOLS = {"node_modules/.bin": ("eslint", "tsc"), ".venv/bin": ("ruff", "mypy")}
+
+
+def source_text(rng: random.Random, kind: str, index: int) -> str:
+    """A small module mixing typed, untyped and `any`-typed definitions."""
+    parts = []
+    for n in range(rng.randint(3, 12)):
+        i = index * 100 + n
+        roll = rng.random()
+        if kind == "py":
+            parts.append(PY_TYPED if roll < 0.6 else PY_UNTYPED if roll < 0.9 else PY_ANY)
+        elif kind == "js":
+            parts.append(JS_BODY)
+        else:
+            parts.append(TS_TYPED if roll < 0.6 else TS_UNTYPED if roll < 0.9 else TS_ANY)
+        parts[-1] = parts[-1].format(i=i)
+    header = "from typing import Any\n\n\n" if kind == "py" else ""
+    return header + "".join(parts)
+
+
+def openapi_spec(paths: int) -> str:
+    spec = {
+        "openapi": "3.0.0",
+        "info": {"title": "Synthetic API", "version": "1.0.0"},
+        "paths": {
+            f"/items/{i}": {
+                "get": {"summary": f"Read item {i}", "responses": {"200": {"description": "ok"}}},
+                "post": {"responses": {"201": {"description": "created"}}},
+            }
+            for i in range(paths)
+        },
+    }
+    return json.dumps(spec, indent=2)
+
+
+def generate_tree(root: Path, files: int, seed: int = 0, bundle_mb: int = 2) -> dict:
+    """Write a synthetic monorepo-like tree of about `files` files; returns its stats."""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    stats = {"files": 0, "bytes": 0}
+
+    def write(rel: str, text: str):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = text.encode('utf-8')
+        path.write_bytes(data)
+        stats["files"] += 1
+        stats["bytes"] += len(data)
+
+    write("package.json", json.dumps({
+        "name": "synthetic",
+        "scripts": {"lint": "eslint . --max-warnings 0"},
+        "devDependencies": {"eslint": "9.0.0", "typescript": "5.0.0"},
+    }, indent=2))
+    write("pyproject.toml", "[project]\nname = \"synthetic\"\nversion = \"0.0.0\"\n")
+    write("tsconfig.json", json.dumps({"compilerOptions": {"strict": True}}))
+    write("eslint.config.js", "export default [{ files: ['**/*.js', '**/*.ts', '**/*.tsx'] }];\n")
+    write(".gitignore", "dist/\nnode_modules/\n__pycache__/\n")
+    for directory, tools in NOOP_TOOLS.items():
+        for tool in tools:
+            write(f"{directory}/{tool}", "#!/bin/sh\nexit 0\n")
+            (root / directory / tool).chmod(0o755)
+            write(f"{directory}/{tool}.cmd", "@exit /b 0\r\n")
+
+    bundles = max(1, files // 20000)
+    line = "var a=function(e){return e&&e.__esModule?e:{default:e}};" * 40 + "\n"
+    for b in range(bundles):
+        write(f"dist/assets/index-{b:04x}.js", line * max(1, bundle_mb * 1024 * 1024 // len(line)))
+
+    remaining = max(0, files - stats["files"])
+    vendored = remaining // 2
+    api = max(2, remaining // 20)
+    source = max(0, remaining - vendored - api)
+
+    kinds = ["py", "ts", "tsx", "js"]
+    for i in range(source):
+        kind = kinds[i % len(kinds)]
+        package, module = divmod(i // FILES_PER_DIR, 8)
+        write(f"packages/pkg{package}/src/mod{module}/file{i}.{kind}", source_text(rng, kind, i))
+
+    for i in range(api):
+        service = i // FILES_PER_DIR
+        if i % 10 == 0:
+            write(f"services/svc{service}/openapi.json", openapi_spec(rng.randint(5, 40)))
+        elif i % 3 == 0:
+            write(f"services/svc{service}/routes/items{i}.py", ROUTE_PY.format(i=i))
+        else:
+            write(f"services/svc{service}/routes/items{i}.ts", ROUTE_TS.format(i=i))
+
+    # Nested node_modules: packages that carry their own node_modules, like an npm v2-style install
+    for i in range(vendored):
+        package, rest = divmod(i, FILES_PER_DIR * 4)
+        nested, index = divmod(rest, FILES_PER_DIR)
+        prefix = f"node_modules/dep{package}"
+        if nested:
+            prefix += f"/node_modules/sub{nested}"
+        write(f"{prefix}/lib/index{index}.js", source_text(rng, "js", i))
+
+    (root / TREE_MARKER).write_text(json.dumps({"files": files, "seed": seed, "bundle_mb": bundle_mb, **stats}),
+                                    encoding='utf-8')
+    return stats
+
+
+def load_tree(root: Path, files: int, seed: int, bundle_mb: int):
+    """Stats of a previously generated tree with the same parameters, else None."""
+    try:
+        meta = json.loads((root / TREE_MARKER).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if (meta.get("files"), meta.get("seed"), meta.get("bundle_mb")) != (files, seed, bundle_mb):
+        return None
+    return {"files": meta["files"], "bytes": meta["bytes"]}
+
+
+# ---------------------------------------------------------------------------
+# Phase plans
+# ---------------------------------------------------------------------------
+
+def load_script(name: str):
+    """Import one of the skill scripts by path without running its main()."""
+    spec = importlib.util.spec_from_file_location(f"bench_{name}", SCRIPTS[name])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def lint_runner_phases(lr, root: Path, scratch: Path) -> list:
+    """lint_runner's own work around the linters: discovery, hashing, report parsing, storage."""
+
+    def targets(ctx):
+        ctx["files"], _ = lr.collect_targets(root, lr.JS_EXTENSIONS + [".py", ".pyi"])
+        # A synthetic eslint report for every JS/TS target, two diagnostics per file
+        report = [{"filePath": str(root / f), "messages": [
+            {"ruleId": "no-unused-vars", "severity": 2, "line": 1, "column": 1, "message": "unused"},
+            {"ruleId": "no-undef", "severity": 1, "line": 2, "column": 3, "message": "undefined"},
+        ]} for f in ctx["files"] if not f.endswith((".py", ".pyi"))]
+        ctx["report"] = json.dumps(report).encode('utf-8')
+        return len(ctx["files"])
+
+    def read(ctx):
+        for rel in ctx["files"]:
+            lr.digest((root / rel).read_bytes())
+        return len(ctx["files"])
+
+    def analysis(ctx):
+        ctx["diagnostics"] = diagnostics = []
+        parser = lr.DiagnosticParser("eslint", root, diagnostics.append)
+        report = ctx["report"]
+        for i in range(0, len(report), lr.READ_CHUNK_BYTES):
+            parser.feed(report[i:i + lr.READ_CHUNK_BYTES])
+        parser.close()
+        return len(diagnostics)
+
+    def reporting(ctx):
+        db = scratch / "diagnostics.db"
+        if db.exists():
+            db.unlink()
+        table = lr.DiagnosticsTable(db)
+        add, flush = table.writer("eslint", "eslint")
+        for d in ctx["diagnostics"]:
+            add(d)
+        flush()
+        table.summary("eslint")
+        table.close()
+        return len(ctx["diagnostics"])
+
+    return [
+        ("discovery", lambda ctx: len(lr.discover_projects(root))),
+        ("discovery:targets", targets),
+        ("read", read),
+        ("analysis", analysis),
+        ("reporting", reporting),
+    ]
+
+
+def type_coverage_phases(tc, root: Path, scratch: Path) -> list:
+    """Reads go through tc.prefetch as in the CLI; Python analysis runs serially on the read bytes."""
+
+    def discovery(ctx):
+        ctx["sources"] = tc.walk_sources(root)
+        return sum(len(paths) for paths in ctx["sources"].values())
+
+    def read(ctx):
+        sources = ctx["sources"]
+        ctx["ts_data"] = list(tc.prefetch(sources[".ts"] + sources[".tsx"], tc.read_typescript))
+        ctx["py_data"] = list(tc.prefetch(sources[".py"]))
+        return sum(len(data or b"") for _, data in ctx["ts_data"] + ctx["py_data"])
+
+    def analysis_typescript(ctx):
+        ctx["ts_counts"] = [(path, tc.scan_typescript_file(path, data)) for path, data in ctx["ts_data"]]
+        return len(ctx["ts_counts"])
+
+    def analysis_python(ctx):
+        ctx["py_counts"] = [(path, tc.analyse_python_source(data)) for path, data in ctx["py_data"]]
+        return len(ctx["py_counts"])
+
+    def reporting(ctx):
+        index = tc.CoverageIndex(root, scratch / tc.INDEX_FILE)  # keep the tree itself untouched
+        for lang, counts in (("typescript", ctx["ts_counts"]), ("python", ctx["py_counts"])):
+            for path, file_counts in counts:
+                if file_counts is not None:
+                    index.add(lang, path, file_counts)
+        index.close()
+        return len(index.dirs)
+
+    def cached_run(ctx):
+        cache = tc.CoverageCache(root, scratch / tc.CACHE_FILE)
+        tc.check_typescript_coverage(root, ctx["sources"], cache)
+        tc.check_python_coverage(root, ctx["sources"], cache)
+        cache.save()
+        return cache
+
+    def cache_fill(ctx):
+        (scratch / tc.CACHE_FILE).unlink(missing_ok=True)
+        return cached_run(ctx).misses
+
+    return [
+        ("discovery", discovery),
+        ("read", read),
+        ("analysis:typescript", analysis_typescript),
+        ("analysis:python", analysis_python),
+        ("reporting", reporting),
+        ("cache:fill", cache_fill),
+        ("cache:warm", lambda ctx: cached_run(ctx).hits),
+    ]
+
+
+def api_validator_phases(av, root: Path, scratch: Path) -> list:
+    """OpenAPI specs are parsed by check_openapi_spec, which reads them itself, in the analysis phase."""
+
+    def is_spec(path: Path) -> bool:
+        return 'openapi' in path.name.lower() or 'swagger' in path.name.lower()
+
+    def discovery(ctx):
+        ctx["files"] = av.find_api_files(root)
+        return len(ctx["files"])
+
+    def read(ctx):
+        ctx["code"] = [(path, path.read_text(encoding='utf-8')) for path in ctx["files"] if not is_spec(path)]
+        return sum(len(content) for _, content in ctx["code"])
+
+    def analysis(ctx):
+        ctx["hits"] = [(path, av.scan_api_rules(content)) for path, content in ctx["code"]]
+        ctx["specs"] = [av.check_openapi_spec(path) for path in ctx["files"] if is_spec(path)]
+        return len(ctx["hits"]) + len(ctx["specs"])
+
+    def reporting(ctx):
+        results = [av.report_api_code(path, hits) for path, hits in ctx["hits"]] + ctx["specs"]
+        return sum(len(r["passed"]) + len(r["issues"]) for r in results)
+
+    return [("discovery", discovery), ("read", read), ("analysis", analysis), ("reporting", reporting)]
+
+
+PHASE_PLANS = {
+    "lint_runner": lint_runner_phases,
+    "type_coverage": type_coverage_phases,
+    "api_validator": api_validator_phases,
+}
+
+END_TO_END_ARGS = {
+    "lint_runner": ["--timeout", "60"],
+    "type_coverage": ["--no-cache"],
+    "api_validator": [],
+}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def time_phases(phases: list, repeat: int) -> dict:
+    """Run the phase chain `repeat` times untraced, then once under tracemalloc."""
+    timings = {name: [] for name, _ in phases}
+    items = {}
+    for _ in range(repeat):
+        ctx = {}
+        for name, fn in phases:
+            start = time.perf_counter()
+            items[name] = fn(ctx)
+            timings[name].append(time.perf_counter() - start)
+
+    peaks = {}
+    ctx = {}
+    tracemalloc.start()
+    try:
+        for name, fn in phases:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn(ctx)
+            peaks[name] = max(0, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    return {name: {
+        "wall_s": round(min(timings[name]), 6),
+        "runs_s": [round(t, 6) for t in timings[name]],
+        "items": items[name],
+        "peak_alloc_kb": peaks[name] // 1024,
+    } for name, _ in phases}
+
+
+def run_end_to_end(name: str, root: Path) -> dict:
+    """Run a script's CLI on the tree; wall time, exit code and the child's peak RSS."""
+    cmd = [sys.executable, str(SCRIPTS[name]), str(root)] + END_TO_END_ARGS[name]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not hasattr(os, "wait4"):
+        try:
+            returncode = proc.wait(timeout=END_TO_END_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            returncode = None
+        return {"wall_s": round(time.perf_counter() - start, 6), "returncode": returncode}
+
+    timer = threading.Timer(END_TO_END_TIMEOUT, proc.kill)
+    timer.start()
+    try:
+        _, status, ru = os.wait4(proc.pid, 0)
+    finally:
+        timer.cancel()
+    proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    max_rss_kb = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+    return {"wall_s": round(time.perf_counter() - start, 6), "returncode": proc.returncode,
+            "max_rss_kb": max_rss_kb}
+
+
+def git_commit() -> str:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(SCRIPTS_DIR),
+                              capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return proc.stdout.strip() if proc.returncode == 0 else ""
+
+
+def compare(previous: dict, current: dict, threshold: float) -> list:
+    """Phases (and end-to-end runs) more than `threshold` percent slower than before."""
+    regressions = []
+    for name, result in current["results"].items():
+        before = previous.get("results", {}).get(name)
+        if not before:
+            continue
+        pairs = [(phase, before["phases"].get(phase), after) for phase, after in result["phases"].items()]
+        pairs.append(("end_to_end", before.get("end_to_end"), result["end_to_end"]))
+        for phase, old, new in pairs:
+            if not old or not old.get("wall_s"):
+                continue
+            change = (new["wall_s"] - old["wall_s"]) / old["wall_s"] * 100
+            if change > threshold:
+                regressions.append({"script": name, "phase": phase, "before_s": old["wall_s"],
+                                    "after_s": new["wall_s"], "change_pct": round(change, 1)})
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the skill scripts on a synthetic tree")
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--bundle-mb", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tree", metavar="DIR", help="generate into (or reuse) DIR and keep it")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scripts", default=",".join(SCRIPTS),
+                        help=f"comma-separated subset of {','.join(SCRIPTS)}")
+    parser.add_argument("--output", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="earlier --output file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="regression threshold in percent for --compare (default: 10)")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    names = [n.strip() for n in args.scripts.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCRIPTS]
+    if unknown:
+        print(f"Unknown script: {', '.join(unknown)}")
+        sys.exit(2)
+
+    print(f"\n{'='*60}")
+    print(f"[BENCHMARK] Skill scripts")
+    print(f"{'='*60}")
+
+    scratch = Path(tempfile.mkdtemp(prefix="skill-bench-"))
+    root = Path(args.tree).resolve() if args.tree else scratch / "tree"
+    try:
+        start = time.perf_counter()
+        tree = load_tree(root, args.files, args.seed, args.bundle_mb)
+        if tree is None:
+            if root.exists() and any(root.iterdir()):
+                print(f"[X] {root} exists and is not a matching benchmark tree")
+                sys.exit(2)
+            tree = generate_tree(root, args.files, args.seed, args.bundle_mb)
+            print(f"Generated: {tree['files']} files ({tree['bytes'] / 1024 / 1024:.1f} MB) "
+                  f"in {time.perf_counter() - start:.1f}s")
+        else:
+            print(f"Reusing: {root} ({tree['files']} files)")
+        print("-"*60)
+
+        results = {}
+        for name in names:
+            module = load_script(name)
+            phases = PHASE_PLANS[name](module, root, scratch)
+            print(f"\n[{name}]")
+            measured = time_phases(phases, max(1, args.repeat))
+            for phase, m in measured.items():
+                print(f"  {phase:<22} {m['wall_s'] * 1000:9.1f} ms  {m['peak_alloc_kb'] / 1024:7.1f} MB peak alloc"
+                      f"  ({m['items']} items)")
+            e2e = run_end_to_end(name, root)
+            rss = f", {e2e['max_rss_kb'] / 1024:.0f} MB peak RSS" if "max_rss_kb" in e2e else ""
+            print(f"  {'end-to-end':<22} {e2e['wall_s'] * 1000:9.1f} ms{rss} (exit {e2e['returncode']})")
+            results[name] = {"phases": measured, "end_to_end": e2e}
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    output = {
+        "script": "benchmark",
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "tree": {"files": tree["files"], "bytes": tree["bytes"], "seed": args.seed, "bundle_mb": args.bundle_mb},
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        if previous.get("tree", {}).get("files") != output["tree"]["files"]:
+            print(f"\n[!] Compared trees differ in size ({previous.get('tree', {}).get('files')} vs {tree['files']} files)")
+        regressions = compare(previous, output, args.threshold)
+        output["compared_to"] = previous.get("commit", args.compare)
+        output["regressions"] = regressions
+        print("\n" + "="*60)
+        if regressions:
+            print(f"[X] {len(regressions)} regressions vs {output['compared_to']} (> {args.threshold:.0f}% slower)")
+            for r in regressions:
+                print(f"   {r['script']} {r['phase']}: {r['before_s'] * 1000:.1f} -> {r['after_s'] * 1000:.1f} ms "
+                      f"(+{r['change_pct']}%)")
+            exit_code = 1
+        else:
+            print(f"[OK] No regressions vs {output['compared_to']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(output, indent=2), encoding='utf-8')
+        print(f"\nResults written to {args.output}")
+    else:
+        print("\n" + json.dumps(output, indent=2))
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Ignore Rules - .gitignore matching shared by lint_runner.py and type_coverage.py.
+Kept free of heavy imports so the fast scripts can load it cheaply.
+"""
+import re
+
+
+class IgnoreRules:
+    """gitignore-style matcher: comments, !negation, /anchoring, dir-only/ and ** globs.
+    
+    Patterns from nested .gitignore files are kept with the directory that
+    declares them and matched against the path relative to it, so a path is
+    only tested against its ancestors' rules. The deepest, last matching rule
+    wins, as in git.
+    """
+    
+    def __init__(self):
+        self.scopes = {}  # base dir -> [(regex, negated, dir_only)]
+    
+    def add(self, patterns, base: str = ""):
+        rules = []
+        for raw in patterns:
+            pattern = raw.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            negated = pattern.startswith("!")
+            pattern = pattern.lstrip("!")
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            pattern = pattern.lstrip("/")
+            if not pattern:
+                continue
+            body = self._translate(pattern)
+            regex = body if anchored else f"(?:.*/)?{body}"
+            rules.append((re.compile(f"^{regex}$"), negated, dir_only))
+        if rules:
+            self.scopes.setdefault(base, []).extend(rules)
+    
+    @staticmethod
+    def _translate(glob: str) -> str:
+        out = []
+        i = 0
+        while i < len(glob):
+            if glob.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+            elif glob.startswith("**", i):
+                out.append(".*")
+                i += 2
+            elif glob[i] == "*":
+                out.append("[^/]*")
+                i += 1
+            elif glob[i] == "?":
+                out.append("[^/]")
+                i += 1
+            elif glob[i] == "[" and "]" in glob[i + 1:]:
+                end = glob.index("]", i + 1)
+                out.append("[" + glob[i + 1:end].replace("!", "^", 1) + "]")
+                i = end + 1
+            else:
+                out.append(re.escape(glob[i]))
+                i += 1
+        return "".join(out)
+    
+    def ignored(self, rel: str, is_dir: bool) -> bool:
+        end = len(rel)
+        while True:
+            cut = rel.rfind("/", 0, end)
+            rules = self.scopes.get(rel[:cut] if cut >= 0 else "")
+            if rules:
+                tail = rel[cut + 1:]
+                for regex, negated, dir_only in reversed(rules):
+                    if dir_only and not is_dir:
+                        continue
+                    if regex.match(tail):
+                        return not negated
+            if cut < 0:
+                return False
+            end = cut
@@ -0,0 +1,208 @@
+#!/usr/bin/env node
+/**
+ * Lint Daemon - warm ESLint / TypeScript worker for lint_runner.py --daemon
+ *
+ * Keeps the project's ESLint instance (config + plugins) and a TypeScript
+ * program loaded between runs, so repeated lint gates skip npm/npx script
+ * resolution, Node boot and plugin loading.
+ *
+ * Usage:
+ *     node lint_daemon.mjs <project_path> <socket_path>
+ *
+ * Protocol: one JSON request per line on a Unix socket, one JSON reply per line.
+ *     {"tool": "eslint", "files": ["src/a.js"] | null, "format": "json" | "stylish", "maxWarnings": 0}
+ *     {"tool": "tsc"}
+ *     {"op": "ping"} / {"op": "shutdown"}
+ * Replies mirror a subprocess result: {"returncode", "stdout", "stderr"}.
+ */
+import fs from 'node:fs'
+import net from 'node:net'
+import path from 'node:path'
+import { createRequire } from 'node:module'
+import { pathToFileURL } from 'node:url'
+
+const projectDir = path.resolve(process.argv[2] || '.')
+const socketPath = process.argv[3] || path.join(projectDir, '.lint-runner', 'daemon.sock')
+const IDLE_TIMEOUT_MS = 30 * 60 * 1000
+
+const requireFromProject = createRequire(path.join(projectDir, 'package.json'))
+
+const ESLINT_CONFIGS = [
+  'eslint.config.js', 'eslint.config.mjs', 'eslint.config.cjs',
+  '.eslintrc', '.eslintrc.js', '.eslintrc.cjs', '.eslintrc.json', '.eslintignore',
+]
+
+function mtimeKey(files) {
+  return files.map((name) => {
+    try {
+      return `${name}:${fs.statSync(path.join(projectDir, name)).mtimeMs}`
+    } catch {
+      return `${name}:-`
+    }
+  }).join('|')
+}
+
+// ---------------------------------------------------------------------------
+// ESLint: one instance per config state, recreated when a config file changes
+// ---------------------------------------------------------------------------
+
+let eslintState = null
+
+async function getESLint() {
+  const key = mtimeKey(ESLINT_CONFIGS)
+  if (eslintState && eslintState.key === key) return eslintState.instance
+
+  const mod = await import(pathToFileURL(requireFromProject.resolve('eslint')).href)
+  const ESLint = mod.loadESLint ? await mod.loadESLint({ cwd: projectDir }) : mod.ESLint
+  eslintState = { key, instance: new ESLint({ cwd: projectDir }) }
+  return eslintState.instance
+}
+
+async function runESLint(request) {
+  const eslint = await getESLint()
+  const results = await eslint.lintFiles(request.files && request.files.length ? request.files : ['.'])
+  const warnings = results.reduce((sum, r) => sum + r.warningCount, 0)
+  // Same verdict as the CLI's --max-warnings (a negative limit means no limit)
+  const tooManyWarnings = typeof request.maxWarnings === 'number' && request.maxWarnings >= 0 && warnings > request.maxWarnings
+  const failed = tooManyWarnings || results.some((r) => r.errorCount > 0 || r.fatalErrorCount > 0)
+  const formatter = await eslint.loadFormatter(request.format === 'json' ? 'json' : 'stylish')
+  return { returncode: failed ? 1 : 0, stdout: await formatter.format(results), stderr: '' }
+}
+
+// ---------------------------------------------------------------------------
+// TypeScript: parsed config + source files cached by mtime, old program reused
+// ---------------------------------------------------------------------------
+
+let tsState = null
+
+function getTypeScript() {
+  if (!tsState) {
+    const ts = requireFromProject('typescript')
+    tsState = { ts, program: null, sourceFiles: new Map(), configKey: null, config: null }
+  }
+  return tsState
+}
+
+function runTsc() {
+  const state = getTypeScript()
+  const { ts } = state
+  const configPath = ts.findConfigFile(projectDir, ts.sys.fileExists)
+
+  const configKey = configPath ? mtimeKey([path.relative(projectDir, configPath)]) : 'none'
+  if (state.configKey !== configKey) {
+    state.config = configPath
+      ? ts.getParsedCommandLineOfConfigFile(configPath, {}, { ...ts.sys, onUnRecoverableConfigFileDiagnostic: () => {} })
+      : { options: {}, fileNames: [], errors: [] }
+    state.configKey = configKey
+    state.program = null
+    state.sourceFiles.clear()
+  }
+
+  const options = { ...state.config.options, noEmit: true }
+  const host = ts.createCompilerHost(options)
+  const getSourceFile = host.getSourceFile.bind(host)
+  host.getSourceFile = (fileName, languageVersion, onError, shouldCreate) => {
+    let mtime = 0
+    try {
+      mtime = fs.statSync(fileName).mtimeMs
+    } catch {
+      // missing files are handled by the compiler itself
+    }
+    const cached = state.sourceFiles.get(fileName)
+    if (cached && cached.mtime === mtime) return cached.sourceFile
+    const sourceFile = getSourceFile(fileName, languageVersion, onError, shouldCreate)
+    if (sourceFile) state.sourceFiles.set(fileName, { mtime, sourceFile })
+    return sourceFile
+  }
+
+  state.program = ts.createProgram({
+    rootNames: state.config.fileNames,
+    options,
+    host,
+    oldProgram: state.program || undefined,
+  })
+  const diagnostics = [...state.config.errors, ...ts.getPreEmitDiagnostics(state.program)]
+  const formatHost = {
+    getCanonicalFileName: (f) => f,
+    getCurrentDirectory: () => projectDir,
+    getNewLine: () => '\n',
+  }
+  return {
+    returncode: diagnostics.length ? 2 : 0,
+    stdout: ts.formatDiagnostics(diagnostics, formatHost),
+    stderr: '',
+  }
+}
+
+// ---------------------------------------------------------------------------
+// Socket server
+// ---------------------------------------------------------------------------
+
+let idleTimer = null
+
+function shutdown() {
+  server.close()
+  try {
+    fs.unlinkSync(socketPath)
+  } catch {
+    // already gone
+  }
+  process.exit(0)
+}
+
+function touch() {
+  clearTimeout(idleTimer)
+  idleTimer = setTimeout(shutdown, IDLE_TIMEOUT_MS)
+}
+
+async function handle(request) {
+  if (request.op === 'ping' || request.op === 'shutdown') return { returncode: 0, stdout: request.op, stderr: '' }
+  if (request.tool === 'eslint') return runESLint(request)
+  if (request.tool === 'tsc') return runTsc()
+  return { returncode: null, stdout: '', stderr: `Unsupported tool: ${request.tool}` }
+}
+
+const server = net.createServer((socket) => {
+  let buffer = ''
+  socket.setEncoding('utf8')
+  socket.on('data', async (chunk) => {
+    buffer += chunk
+    const newline = buffer.indexOf('\n')
+    if (newline === -1) return
+    const line = buffer.slice(0, newline)
+    buffer = ''
+    touch()
+
+    let reply
+    let request = {}
+    try {
+      request = JSON.parse(line)
+      reply = await handle(request)
+    } catch (err) {
+      reply = { returncode: null, stdout: '', stderr: String(err && err.stack ? err.stack : err) }
+    }
+    socket.end(JSON.stringify(reply) + '\n', () => {
+      if (request.op === 'shutdown') shutdown()
+    })
+  })
+  socket.on('error', () => {})
+})
+
+try {
+  fs.unlinkSync(socketPath) // stale socket from a crashed daemon
+} catch {
+  // nothing to clean up
+}
+fs.mkdirSync(path.dirname(socketPath), { recursive: true })
+server.listen(socketPath, () => {
+  touch()
+  // Warm up in the background so the first request is already fast
+  getESLint().catch(() => {})
+  try {
+    getTypeScript()
+  } catch {
+    // project without TypeScript
+  }
+})
+process.on('SIGTERM', shutdown)
+process.on('SIGINT', shutdown)
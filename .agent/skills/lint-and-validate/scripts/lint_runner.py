@@ -4,7 +4,79 @@ Lint Runner - Unified linting and type checking
 Runs appropriate linters based on project type.
 
 Usage:
-    python lint_runner.py <project_path>
+    python lint_runner.py <project_path> [options]
+
+    --jobs N      Run up to N linters concurrently (0 = one per CPU). Always
+                  capped by available memory. Default: 1 (sequential).
+    --all         Discover every sub-project under <project_path> (package.json,
+                  pyproject.toml, requirements.txt, setup.py, netlify.toml
+                  functions dirs) in one walk and lint them all, sharing the
+                  --jobs budget; results are aggregated per package.
+    --timeout S   Override the per-linter timeout (default: 120s each).
+    --incremental Only re-lint files whose content changed since the last run
+                  (plus the files importing them); reuse cached diagnostics for
+                  the rest. State lives in <project>/.lint-runner/manifest.json.
+    --daemon      Send eslint/tsc work to a warm Node worker (lint_daemon.mjs)
+                  listening on a Unix socket. Starts it if absent; until it is
+                  up, linters run as plain subprocesses.
+    --stop-daemon Shut the worker down.
+    --structured  Ask each tool for machine-readable output (eslint -f json,
+                  ruff --output-format json, mypy -O json, tsc text lines),
+                  parse it as it streams and store normalized diagnostics in
+                  <project>/.lint-runner/diagnostics.db.
+    --query K=V   Print diagnostics from the last structured run and exit,
+                  filtered by check, tool, file, rule or severity (repeatable).
+    --no-prune    Let eslint/ruff walk the tree themselves instead of passing
+                  the pruned target list (see below).
+    --watch       After the first run, keep watching the tree (inotify on Linux,
+                  mtime polling elsewhere) and, after a debounced burst of
+                  saves, re-run only the linters whose inputs changed: ruff and
+                  mypy for .py, eslint/tsc for .js/.jsx/.ts/.tsx. eslint and
+                  ruff only get the touched files; a changed config file
+                  re-runs its linter in full.
+    --shards N    Split eslint's target files into N shards balanced by bytes,
+                  lint them in N concurrent eslint processes and merge the JSON
+                  reports deterministically (same pass/fail verdict, including
+                  a global --max-warnings from the lint script).
+    --cache       Answer eslint/ruff per file from a content-addressed SQLite
+                  cache shared by all projects, branches and runs, keyed on
+                  (tool, tool version, config digest, file content hash).
+                  Location: $LINT_RUNNER_CACHE_DIR, else ~/.cache/lint-runner.
+    --cache-size MB   LRU-evict the cache down to this size (default 256).
+    --cache-stats Print cache size, hit rate and bytes saved, then exit.
+    --fail-fast   Stop at the first failing check: kill the process trees of
+                  the checks still running, skip those not started yet, and
+                  report them as cancelled rather than failed.
+    --baseline [FILE]   Only fail on diagnostics that are not in the baseline
+                  (default <project>/.lint-baseline.json). Entries are
+                  fingerprinted by tool, rule, file and the whitespace-
+                  normalized source line, so they survive line shifts.
+                  Implies --structured.
+    --update-baseline   Rewrite the baseline from this run's diagnostics.
+    --no-resolve  Keep launching tools through npx / npm run / PATH. By default
+                  each command is resolved once to its entry point
+                  (node_modules/.bin, searched upwards for hoisted installs, or
+                  the project venv) and exec'd directly; the resolution is
+                  cached in <project>/.lint-runner/resolved.json, keyed on the
+                  lockfiles.
+    --measure-startup   Also time each bypassed npx/npm launcher once (an extra
+                  `<launcher> <tool> --version` run per tool, cached with the
+                  resolution) and report the startup saved per run.
+    --trace FILE  Write a Chrome trace-event file (open in Perfetto or
+                  chrome://tracing) with one slice per check.
+
+Every check records wall time, user/sys CPU and peak RSS of the processes it
+spawned (per-child rusage via os.wait4, so concurrent checks are not mixed
+up) in its JSON "resources" field.
+
+eslint and ruff are given an explicit file list computed by lint_runner: the
+walk honours .gitignore files, ESLint ignores and the `files` extensions of
+the flat config, and skips artifact dirs (dist, build, test-results, ...) and
+dependency dirs (node_modules, venvs) without descending into them.
+
+Linter output is streamed: only the most recent output is kept in memory and
+the full stdout/stderr of each check is spilled to gzip logs under
+<project>/.lint-runner/logs/ (paths are listed in the JSON "logs" field).
 
 Supports:
     - Node.js: npm run lint, npx tsc --noEmit
@@ -13,28 +85,156 @@ Supports:
 
 import subprocess
 import sys
+import os
+import re
 import json
+import gzip
+import hashlib
+import signal
+import socket
+import sqlite3
+import tempfile
+import heapq
+import threading
+import time
+import codecs
+import ctypes
+import ctypes.util
+import select
+import struct
+from collections import Counter, deque
+import argparse
+import shlex
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+# Shared with type_coverage.py, which cannot afford this module's imports
+from ignore_rules import IgnoreRules
+
 # Fix Windows console encoding
 try:
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 except:
     pass
 
+DEFAULT_TIMEOUT = 120
+
+# Rough resident-memory budget of a single linter process (Node-based eslint/tsc
+# and mypy are the heavy ones). Used to cap concurrency on small CI boxes.
+LINTER_MEMORY_MB = 512
+
+STATE_DIR = ".lint-runner"
+
+# Recent output kept in memory per stream; everything else goes to the gzip log
+OUTPUT_TAIL_BYTES = 64 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+# Longest line inspected for diagnostic counting (minified-bundle lines can be MBs)
+MAX_LINE_BYTES = 16 * 1024
+
+# One diagnostic per matching line: eslint stylish, tsc, mypy, ruff
+DIAGNOSTIC_PATTERNS = [
+    re.compile(rb"^\s+\d+:\d+\s+(error|warning)\s"),
+    re.compile(rb"[(:]\d+[,:]\d+\)?:? -? ?(error|warning) TS\d+"),
+    re.compile(rb"^\S.*?:\d+(?::\d+)?: (error|warning|note):"),
+    re.compile(rb"^\S.*?:\d+:\d+: [A-Z]+\d+\b()"),
+]
+MANIFEST_VERSION = 1
+
+# Dependency trees and caches: never descended into, not even to count them
+DEPENDENCY_DIRS = {
+    "node_modules", ".git", "__pycache__", "venv", ".venv",
+    ".mypy_cache", ".ruff_cache", ".pytest_cache", STATE_DIR,
+}
+
+# Generated output: skipped as lint targets, but tallied in the skip report
+ARTIFACT_DIRS = {"dist", "dist-ssr", "build", "coverage", "test-results", "playwright-report"}
+
+# Quiet period that ends a burst of saves in --watch mode, and the longest a
+# continuous burst may postpone a run
+WATCH_DEBOUNCE_S = 0.3
+WATCH_MAX_DELAY_S = 2.0
+WATCH_POLL_INTERVAL_S = 1.0
+
+# Files whose change invalidates a whole-program checker
+TOOL_CONFIG_FILES = {
+    "tsc": ["tsconfig.json", "package.json"],
+    "mypy": ["mypy.ini", "pyproject.toml", "setup.cfg"],
+}
+
+# Files that make a directory a lintable (sub-)project
+PROJECT_MARKERS = ["package.json", "pyproject.toml", "requirements.txt", "setup.py"]
+
+# Above this many characters of file arguments, fall back to passing directories
+MAX_ARG_CHARS = 30000 if os.name == "nt" else 200000
+
+ESLINT_FLAT_CONFIGS = ["eslint.config.js", "eslint.config.mjs", "eslint.config.cjs"]
+
+# Reference point for check start offsets in "resources" and --trace output
+RUN_EPOCH = time.perf_counter()
+
+DEFAULT_CACHE_MB = 256
+
+# Files whose content decides which tool binaries are installed
+LOCKFILES = ("package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+             "bun.lockb", "poetry.lock", "uv.lock", "Pipfile.lock", "requirements.txt", "pyproject.toml")
+VENV_DIRS = (".venv", "venv", "env")
+SHELL_OPERATORS = {"&&", "||", "|", ";", "&", ">", ">>", "<", "2>&1"}
+# Extensions ESLint 9 lints even when a flat config's `files` names others
+ESLINT_BUILTIN_EXTENSIONS = [".js", ".mjs", ".cjs"]
+
+BASELINE_FILE = ".lint-baseline.json"
+BASELINE_VERSION = 1
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Rows buffered before each batched insert into the diagnostics table
+DIAGNOSTIC_BATCH = 500
+
+TSC_DIAGNOSTIC_RE = re.compile(r"^(.+?)\((\d+),(\d+)\): (error|warning) (TS\d+): (.*)$")
+
+# Tools the warm Node worker can serve (see lint_daemon.mjs)
+DAEMON_TOOLS = {"eslint", "tsc"}
+DAEMON_SCRIPT = Path(__file__).with_name("lint_daemon.mjs")
+
+JS_EXTENSIONS = [".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"]
+
+# Per-file linters that can be pointed at an explicit file list. Whole-program
+# checkers (tsc, mypy) are always run in full.
+FILE_LINTERS = {
+    "eslint": {
+        "file_cmd": ["npx", "eslint"],
+        "json_args": ["-f", "json"],
+        "extensions": JS_EXTENSIONS,
+        "config_files": ["eslint.config.js", "eslint.config.mjs", "eslint.config.cjs",
+                         ".eslintrc", ".eslintrc.js", ".eslintrc.cjs", ".eslintrc.json",
+                         ".eslintignore", "package.json"],
+    },
+    "ruff": {
+        "file_cmd": ["ruff", "check"],
+        "json_args": ["--output-format", "json"],
+        "extensions": [".py", ".pyi"],
+        "config_files": ["pyproject.toml", "ruff.toml", ".ruff.toml", "setup.cfg"],
+    },
+}
+
 
 def detect_project_type(project_path: Path) -> dict:
-    """Detect project type and available linters."""
+    """Detect project type and available linters.
+    
+    A directory with both package.json and Python metadata is typed "node+python"
+    and gets both linter sets.
+    """
     result = {
         "type": "unknown",
         "linters": []
     }
+    types = []
     
     # Node.js project
     package_json = project_path / "package.json"
     if package_json.exists():
-        result["type"] = "node"
+        types.append("node")
         try:
             pkg = json.loads(package_json.read_text(encoding='utf-8'))
             scripts = pkg.get("scripts", {})
@@ -42,33 +242,373 @@ def detect_project_type(project_path: Path) -> dict:
             
             # Check for lint script
             if "lint" in scripts:
-                result["linters"].append({"name": "npm lint", "cmd": ["npm", "run", "lint"]})
+                linter = {"name": "npm lint", "cmd": ["npm", "run", "lint"]}
+                script = split_script(scripts["lint"])
+                # Only a single plain eslint call can be re-pointed at a file list
+                if script and script[0] == "eslint":
+                    linter["tool"] = "eslint"
+                    # Same flags as the script, minus its directory arguments
+                    flags = [a for a in script[1:] if a.startswith("-") or not (project_path / a).is_dir()]
+                    linter["file_cmd"] = ["npx", "eslint"] + flags
+                result["linters"].append(linter)
             elif "eslint" in deps:
-                result["linters"].append({"name": "eslint", "cmd": ["npx", "eslint", "."]})
+                result["linters"].append({"name": "eslint", "tool": "eslint", "cmd": ["npx", "eslint", "."]})
             
             # Check for TypeScript
             if "typescript" in deps or (project_path / "tsconfig.json").exists():
-                result["linters"].append({"name": "tsc", "cmd": ["npx", "tsc", "--noEmit"]})
+                result["linters"].append({"name": "tsc", "tool": "tsc", "cmd": ["npx", "tsc", "--noEmit"]})
                 
         except:
             pass
     
     # Python project
-    if (project_path / "pyproject.toml").exists() or (project_path / "requirements.txt").exists():
-        result["type"] = "python"
+    if any((project_path / name).exists() for name in ("pyproject.toml", "requirements.txt", "setup.py")):
+        types.append("python")
         
         # Check for ruff
-        result["linters"].append({"name": "ruff", "cmd": ["ruff", "check", "."]})
+        result["linters"].append({"name": "ruff", "tool": "ruff", "cmd": ["ruff", "check", "."]})
         
         # Check for mypy
         if (project_path / "mypy.ini").exists() or (project_path / "pyproject.toml").exists():
-            result["linters"].append({"name": "mypy", "cmd": ["mypy", "."]})
+            result["linters"].append({"name": "mypy", "tool": "mypy", "cmd": ["mypy", "."]})
+    
+    # Bare JS directory (e.g. Netlify functions): lintable only if it carries its own ESLint config
+    if not types and (any(project_path.glob("*.js")) or any(project_path.glob("*.mjs"))):
+        types.append("node")
+        if any((project_path / name).exists() for name in ESLINT_FLAT_CONFIGS):
+            result["linters"].append({"name": "eslint", "tool": "eslint", "cmd": ["npx", "eslint", "."]})
     
+    if types:
+        result["type"] = "+".join(types)
     return result
 
 
-def run_linter(linter: dict, cwd: Path) -> dict:
-    """Run a single linter and return results."""
+def netlify_function_dirs(root: Path) -> list:
+    """`[functions] directory` entries of netlify.toml (Netlify functions need no package.json)."""
+    source = "\n".join(read_lines(root / "netlify.toml"))
+    section = re.search(r"^\[functions\]\s*$(.*?)(?=^\[|\Z)", source, re.M | re.S)
+    if not section:
+        return []
+    return re.findall(r"^\s*directory\s*=\s*['\"]([^'\"]+)['\"]", section.group(1), re.M)
+
+
+def walk_dirs(root: Path):
+    """Yield (rel_dir, entries) for every directory worth looking at under root.
+    
+    Dependency, artifact and gitignored directories are pruned, never entered.
+    rel_dir is a POSIX path ("" for root); entries are sorted os.DirEntry objects.
+    """
+    rules = IgnoreRules()
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        abs_dir = root / rel_dir
+        rules.add(read_lines(abs_dir / ".gitignore"), base=rel_dir)
+        try:
+            entries = sorted(os.scandir(abs_dir), key=lambda e: e.name)
+        except OSError:
+            continue
+        yield rel_dir, entries
+        for entry in reversed(entries):
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if (entry.is_dir(follow_symlinks=False) and entry.name not in DEPENDENCY_DIRS
+                        and entry.name not in ARTIFACT_DIRS and not rules.ignored(rel, True)):
+                    stack.append(rel)
+            except OSError:
+                continue
+
+
+def discover_projects(root: Path) -> list:
+    """Every sub-project under root, found in a single pruned walk.
+    
+    Returns sorted relative POSIX paths ("." for root itself). Nested projects
+    are kept (monorepo packages under a workspace root); dependency, artifact
+    and gitignored dirs are never entered.
+    """
+    found = set()
+    for rel_dir, entries in walk_dirs(root):
+        abs_dir = root / rel_dir
+        names = {e.name for e in entries}
+        if names.intersection(PROJECT_MARKERS):
+            found.add(rel_dir or ".")
+        if "netlify.toml" in names:
+            for functions in netlify_function_dirs(abs_dir):
+                rel = os.path.normpath(os.path.join(rel_dir, functions)).replace(os.sep, "/")
+                if (root / rel).is_dir():
+                    found.add(rel)
+    return sorted(found)
+
+
+class OutputCapture:
+    """Bounded capture of a process's output streams.
+    
+    Keeps the last OUTPUT_TAIL_BYTES of each stream in memory, optionally spills
+    the full stream to gzip logs, counts diagnostics line by line as chunks
+    arrive and forwards stdout chunks to extra sinks (e.g. a JSON parser).
+    """
+    
+    STREAMS = ("stdout", "stderr")
+    
+    def __init__(self, log_prefix: Path = None, sinks: tuple = ()):
+        self.sinks = list(sinks)
+        self.counts = Counter()
+        self.lines = 0
+        self.bytes = 0
+        self.logs = {}
+        self._tail = {name: deque() for name in self.STREAMS}
+        self._tail_size = dict.fromkeys(self.STREAMS, 0)
+        self._partial = dict.fromkeys(self.STREAMS, b"")
+        self._files = {}
+        self._lock = threading.Lock()
+        if log_prefix is not None:
+            for name in self.STREAMS:
+                path = log_prefix.with_name(f"{log_prefix.name}.{name}.log.gz")
+                self._files[name] = gzip.open(path, "wb", compresslevel=1)
+                self.logs[name] = str(path)
+    
+    def feed(self, stream: str, chunk: bytes):
+        if stream == "stdout":
+            for sink in self.sinks:
+                sink(chunk)
+        with self._lock:
+            self.bytes += len(chunk)
+            if stream in self._files:
+                self._files[stream].write(chunk)
+            
+            tail = self._tail[stream]
+            tail.append(chunk)
+            self._tail_size[stream] += len(chunk)
+            while self._tail_size[stream] - len(tail[0]) >= OUTPUT_TAIL_BYTES:
+                self._tail_size[stream] -= len(tail.popleft())
+            
+            lines = (self._partial[stream] + chunk).split(b"\n")
+            self._partial[stream] = lines.pop()[:MAX_LINE_BYTES]
+            for line in lines:
+                self._count_line(line[:MAX_LINE_BYTES])
+    
+    def _count_line(self, line: bytes):
+        self.lines += 1
+        for pattern in DIAGNOSTIC_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                self.counts[match.group(1).decode() or "error"] += 1
+                return
+    
+    def close(self):
+        with self._lock:
+            for stream in self.STREAMS:
+                if self._partial[stream]:
+                    self._count_line(self._partial[stream])
+                    self._partial[stream] = b""
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+    
+    def tail(self, stream: str) -> str:
+        with self._lock:
+            data = b"".join(self._tail[stream])[-OUTPUT_TAIL_BYTES:]
+        return data.decode('utf-8', errors='replace')
+    
+    def summary(self) -> dict:
+        return {
+            "stdout": self.tail("stdout"),
+            "stderr": self.tail("stderr"),
+            "counts": dict(self.counts),
+            "logs": dict(self.logs),
+        }
+
+
+def clip_tail(text: str, limit: int) -> str:
+    """Last `limit` characters of text, starting at a line boundary when clipped."""
+    if len(text) <= limit:
+        return text
+    clipped = text[-limit:]
+    newline = clipped.find("\n")
+    return clipped[newline + 1:] if 0 <= newline < len(clipped) - 1 else clipped
+
+
+def _pump(pipe, capture: OutputCapture, stream: str):
+    """Reader thread: move a pipe into the capture chunk by chunk."""
+    read = getattr(pipe, "read1", pipe.read)
+    try:
+        while True:
+            chunk = read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            capture.feed(stream, chunk)
+    finally:
+        pipe.close()
+
+
+def kill_tree(proc: subprocess.Popen):
+    """Kill a process and everything it spawned (npm -> node, sh -> tool)."""
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(proc.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        pass
+    try:
+        proc.kill()
+    except OSError:
+        pass
+
+
+# Per-thread resource totals of the check currently running on that thread
+# (shard workers share their check's totals, hence the lock)
+_accounting = threading.local()
+_accounting_lock = threading.Lock()
+
+# --fail-fast: every live process tree is registered here so the first failing
+# check can kill the rest of the run
+_cancel = threading.Event()
+_inflight = set()
+_inflight_lock = threading.Lock()
+
+
+def cancel_inflight():
+    """Stop the run: no new processes start and every live tree is killed."""
+    with _inflight_lock:
+        _cancel.set()
+        procs = list(_inflight)
+    for proc in procs:
+        kill_tree(proc)
+
+
+def _mark_cancelled():
+    usage = getattr(_accounting, "usage", None)
+    if usage is not None:
+        usage["cancelled"] = True
+
+
+def _record_rusage(ru):
+    """Add one reaped child's rusage to the current check's totals."""
+    usage = getattr(_accounting, "usage", None)
+    if usage is None:
+        return
+    max_rss_kb = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+    with _accounting_lock:
+        usage["user_s"] += ru.ru_utime
+        usage["sys_s"] += ru.ru_stime
+        usage["max_rss_kb"] = max(usage["max_rss_kb"], max_rss_kb)
+        usage["processes"] += 1
+
+
+def _wait(proc: subprocess.Popen, timeout: int):
+    """Wait for proc; return its exit code, or None after killing it on timeout.
+    
+    On POSIX the child is reaped with os.wait4 so its own rusage (including
+    the descendants it waited for) is recorded.
+    """
+    if not hasattr(os, "wait4"):
+        try:
+            return proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_tree(proc)
+            proc.wait()
+            return None
+    
+    reaped = []
+    
+    def reap():
+        try:
+            reaped.append(os.wait4(proc.pid, 0))
+        except ChildProcessError:
+            pass
+    
+    waiter = threading.Thread(target=reap, daemon=True)
+    waiter.start()
+    waiter.join(timeout)
+    timed_out = waiter.is_alive()
+    if timed_out:
+        kill_tree(proc)
+        waiter.join()
+    if not reaped:
+        return None if timed_out else proc.wait()
+    _, status, ru = reaped[0]
+    _record_rusage(ru)
+    proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    return None if timed_out else proc.returncode
+
+
+def execute(cmd: list, cwd: Path, timeout: int, capture: OutputCapture = None) -> dict:
+    """Run a command, streaming its output into `capture`.
+    
+    Returns returncode, stdout/stderr tails, diagnostic counts and log paths,
+    or an error message when the command could not run to completion.
+    """
+    capture = capture or OutputCapture()
+    error = ""
+    returncode = None
+    if _cancel.is_set():
+        _mark_cancelled()
+        capture.close()
+        return {"returncode": None, "error": "Cancelled", **capture.summary()}
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            cwd=str(cwd),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+    except FileNotFoundError:
+        error = f"Command not found: {cmd[0]}"
+    except Exception as e:
+        error = str(e)
+    else:
+        readers = [threading.Thread(target=_pump, args=(getattr(proc, name), capture, name), daemon=True)
+                   for name in OutputCapture.STREAMS]
+        for reader in readers:
+            reader.start()
+        with _inflight_lock:
+            _inflight.add(proc)
+            if _cancel.is_set():  # cancelled between the check above and Popen
+                kill_tree(proc)
+        returncode = _wait(proc, timeout)
+        with _inflight_lock:
+            _inflight.discard(proc)
+        if returncode is None:
+            error = f"Timeout after {timeout}s"
+        elif returncode < 0 and _cancel.is_set():
+            _mark_cancelled()
+            returncode = None
+            error = "Cancelled"
+        for reader in readers:
+            reader.join()
+    capture.close()
+    return {"returncode": returncode, "error": error, **capture.summary()}
+
+
+def run_tool(linter: dict, cmd: list, cwd: Path, files: list = None, json_output: bool = False,
+             sinks: tuple = ()) -> dict:
+    """Run a linter command, through the warm daemon when enabled and reachable.
+    
+    Output is streamed into an OutputCapture that spills to
+    <project>/.lint-runner/logs/<linter>.{stdout,stderr}.log.gz.
+    """
+    timeout = linter.get("timeout", DEFAULT_TIMEOUT)
+    log_dir = ensure_state_dir(cwd) / "logs"
+    log_dir.mkdir(exist_ok=True)
+    capture = OutputCapture(log_dir / re.sub(r"[^\w.-]+", "_", linter["name"]), sinks)
+    if linter.get("daemon"):
+        request = {"tool": linter["tool"], "files": files, "format": "json" if json_output else "stylish",
+                   **linter.get("daemon_options", {})}
+        reply = daemon_request(cwd, request, timeout)
+        if reply is not None:
+            capture.feed("stdout", reply["stdout"].encode('utf-8'))
+            capture.feed("stderr", reply["stderr"].encode('utf-8'))
+            capture.close()
+            return {"returncode": reply["returncode"], "error": "", **capture.summary()}
+    return execute(cmd, cwd, timeout, capture)
+
+
+def run_linter(linter: dict, cwd: Path, files: list = None) -> dict:
+    """Run a single linter and return results; `files` narrows a per-file linter."""
     result = {
         "name": linter["name"],
         "passed": False,
@@ -76,33 +616,1744 @@ def run_linter(linter: dict, cwd: Path) -> dict:
         "error": ""
     }
     
+    cmd = linter["cmd"] if files is None else targeted_cmd(linter, files)
+    proc = run_tool(linter, cmd, cwd, files=files)
+    result["output"] = clip_tail(proc["stdout"], 2000)
+    result["error"] = proc["error"] or clip_tail(proc["stderr"], 500)
+    result["passed"] = proc["returncode"] == 0
+    result["counts"] = proc["counts"]
+    result["logs"] = proc["logs"]
+    
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Direct tool resolution
+# ---------------------------------------------------------------------------
+
+def find_node_bin(project_path: Path, tool: str):
+    """node_modules/.bin entry point of a tool, searching parent dirs like npx does."""
+    names = [f"{tool}.cmd", tool] if os.name == "nt" else [tool]
+    for directory in (project_path, *project_path.parents):
+        for name in names:
+            candidate = directory / "node_modules" / ".bin" / name
+            if candidate.is_file():
+                return candidate
+    return None
+
+
+def find_python_bin(project_path: Path, tool: str):
+    """Executable of a Python tool in the project venv, the active venv, or on PATH."""
+    sub, suffix = ("Scripts", ".exe") if os.name == "nt" else ("bin", "")
+    venvs = [project_path / name for name in VENV_DIRS]
+    if os.environ.get("VIRTUAL_ENV"):
+        venvs.append(Path(os.environ["VIRTUAL_ENV"]))
+    for venv in venvs:
+        candidate = venv / sub / f"{tool}{suffix}"
+        if candidate.is_file():
+            return candidate
+    found = shutil.which(tool)
+    return Path(found) if found else None
+
+
+def split_script(script: str) -> list:
+    """argv of an npm script that is a single plain command, or [] if it uses shell syntax."""
     try:
-        proc = subprocess.run(
-            linter["cmd"],
-            cwd=str(cwd),
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            timeout=120
-        )
+        argv = shlex.split(script)
+    except ValueError:
+        return []
+    if SHELL_OPERATORS.intersection(argv) or any("$" in arg for arg in argv):
+        return []
+    return argv
+
+
+def direct_cmd(cmd: list, project_path: Path, scripts: dict):
+    """(direct argv, launcher it bypasses) for a linter command, or None if it cannot be resolved.
+    
+    `npm run <script>` is only unwrapped when the script is a single plain
+    command without pre/post hooks; anything using shell syntax, or with a
+    `pre<script>`/`post<script>` entry npm would run around it, keeps going
+    through npm.
+    """
+    if cmd[:1] == ["npx"] and len(cmd) > 1:
+        entry = find_node_bin(project_path, cmd[1])
+        return ([str(entry)] + cmd[2:], "npx") if entry else None
+    if cmd[:2] == ["npm", "run"] and len(cmd) > 2 and cmd[2] in scripts:
+        if f"pre{cmd[2]}" in scripts or f"post{cmd[2]}" in scripts:
+            return None
+        script = split_script(scripts[cmd[2]])
+        if not script:
+            return None
+        entry = find_node_bin(project_path, script[0])
+        extra = cmd[4:] if cmd[3:4] == ["--"] else cmd[3:]
+        return ([str(entry)] + script[1:] + extra, "npm") if entry else None
+    if cmd[:1] == ["ruff"] or cmd[:1] == ["mypy"]:
+        entry = find_python_bin(project_path, cmd[0])
+        return ([str(entry)] + cmd[1:], "PATH") if entry else None
+    return None
+
+
+def launcher_overhead_ms(tool: str, entry: str, cwd: Path) -> int:
+    """Measured cost of booting npm/npx before `tool`: `npx --no-install tool --version` minus the direct call."""
+    timings = []
+    for cmd in (["npx", "--no-install", tool, "--version"], [entry, "--version"]):
+        start = time.perf_counter()
+        proc = execute(cmd, cwd, 30)
+        if proc["returncode"] != 0:
+            return 0
+        timings.append(time.perf_counter() - start)
+    return max(0, round((timings[0] - timings[1]) * 1000))
+
+
+def resolve_linters(project_path: Path, linters: list, measure: bool = False) -> int:
+    """Point each linter's cmd/file_cmd at the tool's entry point; returns the startup saved per run in ms.
+    
+    Resolutions are cached in .lint-runner/resolved.json under a digest of the
+    lockfiles and the active venv, and re-done when that changes or a cached
+    binary disappears. Launcher overhead is only timed with `measure`, since
+    it costs two extra tool starts per resolved command.
+    """
+    state = project_path / STATE_DIR / "resolved.json"
+    key_parts = [os.environ.get("VIRTUAL_ENV", "").encode()]
+    for name in LOCKFILES:
+        try:
+            key_parts.append(name.encode() + b"\0" + (project_path / name).read_bytes())
+        except OSError:
+            pass
+    key = digest(b"\0".join(key_parts))
+    try:
+        cached = json.loads(state.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cached = {}
+    commands = cached.get("commands", {}) if cached.get("key") == key else {}
+    
+    scripts = None
+    dirty = False
+    saved_total = 0
+    for linter in linters:
+        if linter.get("tool") in FILE_LINTERS and "file_cmd" not in linter:
+            linter["file_cmd"] = list(FILE_LINTERS[linter["tool"]]["file_cmd"])
+        for field in ("cmd", "file_cmd"):
+            if field not in linter:
+                continue
+            original = linter[field]
+            entry = commands.get(" ".join(original))
+            if entry is None or (entry["cmd"] and not Path(entry["cmd"][0]).is_file()):
+                if scripts is None:
+                    try:
+                        scripts = json.loads((project_path / "package.json").read_text(encoding='utf-8')).get("scripts", {})
+                    except (OSError, ValueError):
+                        scripts = {}
+                resolved = direct_cmd(original, project_path, scripts)
+                entry = {"cmd": [], "launcher": None, "saved_ms": 0}
+                if resolved:
+                    entry.update(cmd=resolved[0], launcher=resolved[1])
+                commands[" ".join(original)] = entry
+                dirty = True
+            if not entry["cmd"]:
+                continue
+            if measure and entry["launcher"] != "PATH" and "measured" not in entry:
+                entry_path = Path(entry["cmd"][0])
+                tool = entry_path.stem if os.name == "nt" else entry_path.name
+                entry["saved_ms"] = launcher_overhead_ms(tool, entry["cmd"][0], project_path)
+                entry["measured"] = True
+                dirty = True
+            linter[field] = list(entry["cmd"])
+            if field == "cmd":
+                linter["resolved"] = {"from": " ".join(original), "launcher": entry["launcher"],
+                                      "saved_ms": entry["saved_ms"]}
+                saved_total += entry["saved_ms"]
+    
+    if dirty:
+        ensure_state_dir(project_path)
+        state.write_text(json.dumps({"key": key, "commands": commands}, indent=2), encoding='utf-8')
+    return saved_total
+
+
+# ---------------------------------------------------------------------------
+# Incremental mode
+# ---------------------------------------------------------------------------
+
+def load_manifest(project_path: Path) -> dict:
+    """Load the incremental-lint manifest; a missing or stale one starts empty."""
+    try:
+        manifest = json.loads((project_path / STATE_DIR / "manifest.json").read_text(encoding='utf-8'))
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "linters": {}}
+
+
+def ensure_state_dir(project_path: Path) -> Path:
+    """Create <project>/.lint-runner, self-ignored so it never shows up in git status."""
+    state_dir = project_path / STATE_DIR
+    state_dir.mkdir(exist_ok=True)
+    ignore_file = state_dir / ".gitignore"
+    if not ignore_file.exists():
+        ignore_file.write_text("*\n", encoding='utf-8')
+    return state_dir
+
+
+def save_manifest(project_path: Path, manifest: dict):
+    state_dir = ensure_state_dir(project_path)
+    tmp = state_dir / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest), encoding='utf-8')
+    os.replace(tmp, state_dir / "manifest.json")
+
+
+def read_lines(path: Path) -> list:
+    try:
+        return path.read_text(encoding='utf-8', errors='replace').splitlines()
+    except OSError:
+        return []
+
+
+def eslint_settings(project_path: Path) -> dict:
+    """Ignore patterns and linted extensions declared by the project's ESLint setup.
+    
+    Flat configs are JavaScript, so this only scrapes the literal `ignores`
+    and `files` arrays; anything dynamic is left to ESLint itself.
+    """
+    ignores = read_lines(project_path / ".eslintignore")
+    extensions = set()
+    for name in ESLINT_FLAT_CONFIGS:
+        path = project_path / name
+        if not path.is_file():
+            continue
+        source = path.read_text(encoding='utf-8', errors='replace')
+        for block in re.findall(r"\bignores\s*:\s*\[(.*?)\]", source, re.S):
+            ignores.extend(re.findall(r"['\"]([^'\"]+)['\"]", block))
+        for block in re.findall(r"\bfiles\s*:\s*\[(.*?)\]", source, re.S):
+            for glob in re.findall(r"['\"]([^'\"]+)['\"]", block):
+                group = re.search(r"\.\{([\w,]+)\}$", glob)
+                single = re.search(r"\*\.(\w+)$", glob)
+                if group:
+                    extensions.update(f".{e}" for e in group.group(1).split(","))
+                elif single:
+                    extensions.add(f".{single.group(1)}")
+        break
+    return {"ignores": ignores, "extensions": sorted(extensions)}
+
+
+def _tally(path: str, extensions: list, stats: dict):
+    """Count candidate files/bytes under an ignored directory (stat only, no reads)."""
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in DEPENDENCY_DIRS:
+                    _tally(entry.path, extensions, stats)
+            elif os.path.splitext(entry.name)[1] in extensions:
+                stats["skipped_files"] += 1
+                stats["skipped_bytes"] += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+
+
+def collect_targets(project_path: Path, extensions: list, extra_ignores: list = ()) -> tuple:
+    """Walk the project once and return (files, stats) for the given extensions.
+    
+    files are sorted relative POSIX paths. Dependency dirs are never entered;
+    artifact dirs and paths ignored by .gitignore/extra_ignores are not linted
+    and are reported in stats (skipped_files, skipped_bytes, skipped_dirs).
+    """
+    rules = IgnoreRules()
+    rules.add(extra_ignores)
+    stats = {"files": 0, "bytes": 0, "skipped_files": 0, "skipped_bytes": 0, "skipped_dirs": 0}
+    files = []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        abs_dir = project_path / rel_dir
+        rules.add(read_lines(abs_dir / ".gitignore"), base=rel_dir)
+        try:
+            entries = sorted(os.scandir(abs_dir), key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if is_dir:
+                    if entry.name in DEPENDENCY_DIRS:
+                        continue
+                    if entry.name in ARTIFACT_DIRS or rules.ignored(rel, True):
+                        stats["skipped_dirs"] += 1
+                        _tally(entry.path, extensions, stats)
+                    else:
+                        subdirs.append(rel)
+                elif os.path.splitext(entry.name)[1] in extensions:
+                    size = entry.stat(follow_symlinks=False).st_size
+                    if rules.ignored(rel, False):
+                        stats["skipped_files"] += 1
+                        stats["skipped_bytes"] += size
+                    else:
+                        files.append(rel)
+                        stats["bytes"] += size
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+    files.sort()
+    stats["files"] = len(files)
+    return files, stats
+
+
+def lint_targets(linter: dict, cwd: Path, session: dict = None) -> tuple:
+    """Pruned (files, stats) for a per-file linter, memoized per run in session."""
+    tool = linter["tool"]
+    memo = (session or {}).setdefault("targets", {})
+    if tool not in memo:
+        extensions = FILE_LINTERS[tool]["extensions"]
+        ignores = []
+        if tool == "eslint":
+            settings = eslint_settings(cwd)
+            if settings["extensions"]:
+                extensions = sorted(set(settings["extensions"]) | set(ESLINT_BUILTIN_EXTENSIONS))
+            ignores = settings["ignores"]
+        memo[tool] = collect_targets(cwd, extensions, ignores)
+    return memo[tool]
+
+
+def file_args(files: list) -> list:
+    """Files to put on a command line; collapses to top-level paths if the list is too long."""
+    if sum(len(f) + 1 for f in files) <= MAX_ARG_CHARS:
+        return files
+    return sorted({f.split("/", 1)[0] for f in files})
+
+
+def arg_batches(files: list) -> list:
+    """Split files into consecutive batches that each fit on one command line."""
+    batches, batch, size = [], [], 0
+    for f in files:
+        if batch and size + len(f) + 1 > MAX_ARG_CHARS:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(f)
+        size += len(f) + 1
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def targeted_cmd(linter: dict, files: list, json_output: bool = False) -> list:
+    """Per-file linter command pointed at an explicit file list."""
+    spec = FILE_LINTERS[linter["tool"]]
+    cmd = list(linter.get("file_cmd", spec["file_cmd"]))
+    if json_output:
+        cmd += spec["json_args"]
+    return cmd + file_args(files)
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def config_digest(project_path: Path, config_files: list) -> str:
+    """Hash of every config file that can change a linter's verdict."""
+    h = hashlib.sha1()
+    for name in config_files:
+        path = project_path / name
+        if path.is_file():
+            h.update(name.encode() + b"\0" + path.read_bytes() + b"\0")
+    return h.hexdigest()
+
+
+def tool_version(linter: dict, project_path: Path) -> str:
+    """Version of the linter binary this run will exec; Node tools are read from node_modules without spawning.
+    
+    The entry point is the resolved command's (a venv or hoisted node_modules
+    binary), so upgrading the copy that actually runs changes the version.
+    """
+    tool = linter["tool"]
+    entry = (linter.get("file_cmd") or linter["cmd"])[0]
+    if entry in ("npx", "npm"):
+        entry = find_node_bin(project_path, tool)
+    elif entry == tool:
+        entry = find_python_bin(project_path, tool) or tool
+    entry = Path(entry) if entry else None
+    if entry is not None and entry.parent.name == ".bin":
+        pkg = entry.parent.parent / tool / "package.json"
+        try:
+            return json.loads(pkg.read_text(encoding='utf-8')).get("version", "")
+        except (OSError, ValueError):
+            return ""
+    proc = execute([str(entry or tool), "--version"], project_path, 30)
+    return proc["stdout"].strip()
+
+
+JS_IMPORT_RE = re.compile(
+    r"""(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\s*\(\s*)['"](\.{1,2}/[^'"]+)['"]""")
+PY_IMPORT_RE = re.compile(
+    r"^\s*(?:from\s+(\.*)([\w.]*)\s+import\s*\(?([\w\s,]*)|import\s+([\w.]+))", re.M)
+
+
+def resolve_imports(rel_path: str, content: str, known: set) -> list:
+    """Project-local files imported by `rel_path` (relative JS specifiers, Python modules)."""
+    path = Path(rel_path)
+    found = set()
+    if path.suffix in (".py", ".pyi"):
+        for dots, module, names, plain in PY_IMPORT_RE.findall(content):
+            if plain:
+                base, parts, names = Path(), plain.split("."), ""
+            else:
+                base = path.parent
+                for _ in range(max(len(dots) - 1, 0)):
+                    base = base.parent
+                base = base if dots else Path()
+                parts = module.split(".") if module else []
+            target = base.joinpath(*parts)
+            # `from pkg import mod` may name a submodule rather than an attribute
+            modules = [target] + [target / name for name in re.findall(r"\w+", names)]
+            for module_path in modules:
+                for candidate in (f"{module_path.as_posix()}.py", (module_path / "__init__.py").as_posix()):
+                    if candidate in known:
+                        found.add(candidate)
+    else:
+        for spec in JS_IMPORT_RE.findall(content):
+            target = os.path.normpath((path.parent / spec).as_posix()).replace(os.sep, "/")
+            candidates = [target] + [target + ext for ext in JS_EXTENSIONS] + \
+                         [f"{target}/index{ext}" for ext in JS_EXTENSIONS]
+            for candidate in candidates:
+                if candidate in known:
+                    found.add(candidate)
+                    break
+    found.discard(rel_path)
+    return sorted(found)
+
+
+def relative_to_project(file_path: str, project_path: Path) -> str:
+    path = Path(file_path)
+    if path.is_absolute():
+        try:
+            return path.relative_to(project_path).as_posix()
+        except ValueError:
+            return path.as_posix()
+    return path.as_posix()
+
+
+# ---------------------------------------------------------------------------
+# Structured diagnostics
+# ---------------------------------------------------------------------------
+
+class JSONArrayStream:
+    """Incremental parser for a top-level JSON array, fed in byte chunks.
+    
+    Calls on_item for every element as soon as it is complete, so memory is
+    bounded by the largest element (one file's report) rather than the whole
+    document. Parse attempts on an incomplete element are retried only after
+    the buffer has doubled, which keeps the total work linear.
+    """
+    
+    def __init__(self, on_item):
+        self.on_item = on_item
+        self.error = None
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._buf = ""
+        self._state = "start"  # start -> items -> done
+        self._retry_at = 0
+    
+    def feed(self, chunk: bytes):
+        if self._state == "done" or self.error:
+            return
+        self._buf += self._text.decode(chunk)
+        if len(self._buf) >= self._retry_at:
+            self._drain()
+    
+    def close(self):
+        self._buf += self._text.decode(b"", final=True)
+        self._retry_at = 0
+        self._drain()
+        if self._state == "items" and not self.error:
+            self.error = "truncated JSON report"
+    
+    def _drain(self):
+        buf = self._buf
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if self._state == "start":
+                if buf[pos] != "[":
+                    self.error = f"expected a JSON array, got {buf[pos:pos + 40]!r}"
+                    return
+                self._state = "items"
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                self._state = "done"
+                pos = len(buf)
+                break
+            try:
+                item, end = self._decoder.raw_decode(buf, pos)
+            except ValueError:
+                self._retry_at = 2 * (len(buf) - pos)
+                break
+            self.on_item(item)
+            pos = end
+        self._buf = buf[pos:]
+        if pos:
+            self._retry_at = 0
+
+
+class LineStream:
+    """Feeds complete text lines to on_line (mypy JSON Lines, tsc text output)."""
+    
+    def __init__(self, on_line):
+        self.on_line = on_line
+        self.error = None
+        self._text = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._partial = ""
+    
+    def feed(self, chunk: bytes):
+        lines = (self._partial + self._text.decode(chunk)).split("\n")
+        self._partial = lines.pop()[:MAX_LINE_BYTES]
+        for line in lines:
+            self.on_line(line.rstrip("\r"))
+    
+    def close(self):
+        rest = self._partial + self._text.decode(b"", final=True)
+        if rest.strip():
+            self.on_line(rest)
+
+
+def structured_cmd(linter: dict, files: list = None) -> list:
+    """The linter's command, switched to its machine-readable output format."""
+    tool = linter.get("tool")
+    if files is not None:
+        return targeted_cmd(linter, files, json_output=True)
+    cmd = list(linter["cmd"])
+    if tool == "eslint" and cmd[:2] == ["npm", "run"]:
+        # --silent drops npm's "> lint" banner from stdout
+        return ["npm", "run", "--silent"] + cmd[2:] + ["--", "-f", "json"]
+    if tool in FILE_LINTERS:
+        return cmd + FILE_LINTERS[tool]["json_args"]
+    if tool == "mypy":
+        return cmd + ["-O", "json"]
+    return cmd  # tsc: its plain "file(line,col): error TSxxxx" lines are parsed as-is
+
+
+class DiagnosticParser:
+    """Turns a tool's streamed report into normalized diagnostics.
+    
+    Each diagnostic is a dict with file, line, column, rule, severity and
+    message; on_diagnostic is called as soon as one is parsed.
+    """
+    
+    def __init__(self, tool: str, project_path: Path, on_diagnostic):
+        self.tool = tool
+        self.project_path = project_path
+        self.on_diagnostic = on_diagnostic
+        if tool in ("eslint", "ruff"):
+            self.stream = JSONArrayStream(self._item)
+        else:
+            self.stream = LineStream(self._line)
+        self.feed = self.stream.feed
+    
+    @property
+    def error(self):
+        return self.stream.error
+    
+    def close(self):
+        self.stream.close()
+    
+    def _emit(self, file_path, line, column, rule, severity, message):
+        self.on_diagnostic({
+            "file": relative_to_project(file_path, self.project_path),
+            "line": line or 0,
+            "column": column or 0,
+            "rule": rule or "",
+            "severity": severity,
+            "message": message or "",
+        })
+    
+    def _item(self, item: dict):
+        if self.tool == "eslint":
+            for m in item.get("messages", []):
+                severity = "error" if m.get("severity") == 2 else "warning"
+                self._emit(item["filePath"], m.get("line"), m.get("column"), m.get("ruleId"),
+                           severity, m.get("message"))
+        else:
+            location = item.get("location") or {}
+            self._emit(item["filename"], location.get("row"), location.get("column"), item.get("code"),
+                       "error", item.get("message"))
+    
+    def _line(self, line: str):
+        if self.tool == "mypy":
+            if not line.startswith("{"):
+                return
+            try:
+                d = json.loads(line)
+            except ValueError:
+                return
+            self._emit(d.get("file", ""), d.get("line"), (d.get("column") or 0) + 1, d.get("code"),
+                       d.get("severity", "error"), d.get("message"))
+        else:
+            match = TSC_DIAGNOSTIC_RE.match(line)
+            if match:
+                path, row, col, severity, code, message = match.groups()
+                self._emit(path, int(row), int(col), code, severity, message)
+
+
+class DiagnosticsTable:
+    """SQLite-backed table of normalized diagnostics, queryable after the run.
+    
+    Rows are inserted in batches while reports stream in, so the full result
+    set never has to sit in memory.
+    """
+    
+    COLUMNS = ("check_name", "tool", "file", "line", "column", "rule", "severity", "message")
+    FILTERS = {"check": "check_name", "tool": "tool", "file": "file", "rule": "rule", "severity": "severity"}
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS diagnostics (
+                check_name TEXT, tool TEXT, file TEXT, line INTEGER, "column" INTEGER,
+                rule TEXT, severity TEXT, message TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_diagnostics_check ON diagnostics(check_name);
+            CREATE INDEX IF NOT EXISTS idx_diagnostics_file ON diagnostics(file);
+            CREATE INDEX IF NOT EXISTS idx_diagnostics_rule ON diagnostics(rule);
+        """)
+    
+    def writer(self, check_name: str, tool: str):
+        """Start a fresh result set for one check; returns (add, flush) callables."""
+        with self._lock:
+            self._db.execute("DELETE FROM diagnostics WHERE check_name = ?", (check_name,))
+            self._db.commit()
+        pending = []
         
-        result["output"] = proc.stdout[:2000] if proc.stdout else ""
-        result["error"] = proc.stderr[:500] if proc.stderr else ""
-        result["passed"] = proc.returncode == 0
+        def flush():
+            if not pending:
+                return
+            with self._lock:
+                self._db.executemany(
+                    'INSERT INTO diagnostics VALUES (?, ?, ?, ?, ?, ?, ?, ?)', pending)
+                self._db.commit()
+            pending.clear()
         
-    except FileNotFoundError:
-        result["error"] = f"Command not found: {linter['cmd'][0]}"
-    except subprocess.TimeoutExpired:
-        result["error"] = "Timeout after 120s"
-    except Exception as e:
-        result["error"] = str(e)
+        def add(d: dict):
+            pending.append((check_name, tool, d["file"], d["line"], d["column"],
+                            d["rule"], d["severity"], d["message"]))
+            if len(pending) >= DIAGNOSTIC_BATCH:
+                flush()
+        
+        return add, flush
+    
+    def summary(self, check_name: str) -> dict:
+        with self._lock:
+            severities = dict(self._db.execute(
+                "SELECT severity, COUNT(*) FROM diagnostics WHERE check_name = ? GROUP BY severity",
+                (check_name,)).fetchall())
+            files = self._db.execute(
+                "SELECT COUNT(DISTINCT file) FROM diagnostics WHERE check_name = ?", (check_name,)).fetchone()[0]
+            rules = self._db.execute(
+                "SELECT rule, COUNT(*) AS n FROM diagnostics WHERE check_name = ? "
+                "GROUP BY rule ORDER BY n DESC, rule LIMIT 5", (check_name,)).fetchall()
+        return {"by_severity": severities, "files": files, "top_rules": [{"rule": r, "count": n} for r, n in rules]}
     
+    def query(self, filters: dict = None, limit: int = 200) -> list:
+        """Rows matching exact-value filters (keys from FILTERS), ordered by file and line."""
+        clauses, params = [], []
+        for key, value in (filters or {}).items():
+            clauses.append(f"{self.FILTERS[key]} = ?")
+            params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT * FROM diagnostics {where} ORDER BY file, line, "column" LIMIT ?',
+                params + [limit]).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+    
+    def rows(self, check_name: str, batch: int = DIAGNOSTIC_BATCH):
+        """Yield every stored diagnostic of one check, ordered by file and line."""
+        with self._lock:
+            cursor = self._db.execute(
+                'SELECT * FROM diagnostics WHERE check_name = ? ORDER BY file, line, "column"', (check_name,))
+            rows = cursor.fetchmany(batch)
+        while rows:
+            for row in rows:
+                yield dict(zip(self.COLUMNS, row))
+            with self._lock:
+                rows = cursor.fetchmany(batch)
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def format_diagnostic(d: dict) -> str:
+    return f"{d['file']}:{d['line']}:{d['column']}: {d['severity']} {d['message']} [{d['rule']}]"
+
+
+def run_structured(linter: dict, cwd: Path, table: DiagnosticsTable, files: list = None) -> dict:
+    """Run a linter in its machine-readable mode and stream diagnostics into the table."""
+    result = {
+        "name": linter["name"],
+        "passed": False,
+        "output": "",
+        "error": ""
+    }
+    
+    add, flush = table.writer(linter["name"], linter["tool"])
+    parser = DiagnosticParser(linter["tool"], cwd, add)
+    proc = run_tool(linter, structured_cmd(linter, files), cwd, files=files, json_output=True,
+                    sinks=(parser.feed,))
+    parser.close()
+    flush()
+    
+    diagnostics = table.summary(linter["name"])
+    preview = table.query({"check": linter["name"]}, limit=20)
+    result["output"] = "\n".join(format_diagnostic(d) for d in preview)
+    result["error"] = proc["error"] or clip_tail(proc["stderr"], 500)
+    if parser.error and not result["error"]:
+        result["error"] = f"Could not parse {linter['tool']} report: {parser.error}"
+    result["passed"] = proc["returncode"] == 0
+    result["counts"] = diagnostics["by_severity"]
+    result["diagnostics"] = diagnostics
+    result["logs"] = proc["logs"]
+    return result
+
+
+def shard_files(cwd: Path, files: list, count: int) -> list:
+    """Split files into `count` shards of similar total size (greedy largest-first).
+    
+    Deterministic for a given tree: ties are broken by path and shard index.
+    Returns non-empty shards, each a sorted file list.
+    """
+    sized = []
+    for rel in files:
+        try:
+            sized.append((os.path.getsize(cwd / rel), rel))
+        except OSError:
+            sized.append((0, rel))
+    sized.sort(key=lambda item: (-item[0], item[1]))
+    heap = [(0, i) for i in range(max(1, min(count, len(files))))]
+    shards = [[] for _ in heap]
+    for size, rel in sized:
+        total, i = heapq.heappop(heap)
+        shards[i].append(rel)
+        heapq.heappush(heap, (total + size, i))
+    return [sorted(shard) for shard in shards if shard]
+
+
+def max_warnings(cmd: list):
+    """Split an eslint --max-warnings flag out of cmd: (cmd without it, limit or None)."""
+    out, limit = [], None
+    i = 0
+    while i < len(cmd):
+        arg = cmd[i]
+        if arg == "--max-warnings" and i + 1 < len(cmd):
+            limit = int(cmd[i + 1])
+            i += 2
+            continue
+        if arg.startswith("--max-warnings="):
+            limit = int(arg.split("=", 1)[1])
+        else:
+            out.append(arg)
+        i += 1
+    return out, limit
+
+
+def run_sharded(linter: dict, cwd: Path, files: list, count: int, table: DiagnosticsTable = None) -> dict:
+    """Lint files with one eslint process per size-balanced shard and merge the reports.
+    
+    Each shard must exit 0 or 1 (2 is a crash); the verdict is recomputed on
+    the merged diagnostics so it matches a single-process run: no errors, and
+    no more warnings than a global --max-warnings if the script sets one.
+    A shard too long for one command line is split into several processes
+    rather than widened to directories, so every file is linted exactly once.
+    """
+    result = {
+        "name": linter["name"],
+        "passed": False,
+        "output": "",
+        "error": ""
+    }
+    shards = [batch for shard in shard_files(cwd, files, count) for batch in arg_batches(shard)]
+    base_cmd, warning_limit = max_warnings(targeted_cmd(linter, [], json_output=True))
+    usage = getattr(_accounting, "usage", None)
+    
+    def lint_shard(index: int, shard: list) -> tuple:
+        _accounting.usage = usage
+        diagnostics = []
+        parser = DiagnosticParser("eslint", cwd, diagnostics.append)
+        shard_linter = {**linter, "name": f"{linter['name']}.shard{index}", "daemon": False}
+        start = time.perf_counter()
+        proc = run_tool(shard_linter, base_cmd + shard, cwd, sinks=(parser.feed,))
+        parser.close()
+        _accounting.usage = None
+        proc["wall_s"] = round(time.perf_counter() - start, 6)
+        return proc, parser.error, diagnostics
+    
+    workers = max_parallel_linters(len(shards), count)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(lambda args: lint_shard(*args), enumerate(shards)))
+    
+    merged = []
+    errors = []
+    result["shards"] = []
+    for shard, (proc, parse_error, diagnostics) in zip(shards, outcomes):
+        merged.extend(diagnostics)
+        result["shards"].append({"files": len(shard), "returncode": proc["returncode"],
+                                 "wall_s": proc["wall_s"], "logs": proc["logs"]})
+        if proc["error"] or proc["returncode"] not in (0, 1):
+            errors.append(proc["error"] or clip_tail(proc["stderr"], 500))
+        elif parse_error:
+            errors.append(f"Could not parse eslint report: {parse_error}")
+    merged.sort(key=lambda d: (d["file"], d["line"], d["column"], d["rule"], d["message"]))
+    
+    counts = Counter(d["severity"] for d in merged)
+    if table is not None:
+        add, flush = table.writer(linter["name"], linter["tool"])
+        for d in merged:
+            add(d)
+        flush()
+        result["diagnostics"] = table.summary(linter["name"])
+    result["output"] = "\n".join(format_diagnostic(d) for d in merged[:20])
+    result["error"] = "\n".join(e for e in errors if e)
+    result["passed"] = not errors and counts["error"] == 0 and (
+        warning_limit is None or warning_limit < 0 or counts["warning"] <= warning_limit)
+    result["counts"] = dict(counts)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Shared result cache
+# ---------------------------------------------------------------------------
+
+def cache_dir() -> Path:
+    if os.environ.get("LINT_RUNNER_CACHE_DIR"):
+        return Path(os.environ["LINT_RUNNER_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "lint-runner"
+
+
+class ResultCache:
+    """Content-addressed per-file diagnostics, shared across projects, branches and runs.
+    
+    Entries are keyed on sha1(tool, tool version, config digest, file content
+    hash), so a file that reappears after a branch switch or rebase is answered
+    without re-analysis. Least-recently-used entries are evicted by size.
+    """
+    
+    STATS = ("hits", "misses", "bytes_saved", "evictions")
+    
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, tool TEXT, diagnostics TEXT, bytes INTEGER, last_used REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+            CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value REAL);
+        """)
+    
+    @staticmethod
+    def key(fingerprint: str, file_hash: str) -> str:
+        return digest(f"{fingerprint}\0{file_hash}".encode())
+    
+    def get_many(self, keys: list) -> dict:
+        """key -> diagnostics list for every key present; refreshes their LRU stamp."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, diagnostics FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                    batch).fetchall()
+                found.update((k, json.loads(v)) for k, v in rows)
+            self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            self._db.commit()
+        return found
+    
+    def put_many(self, tool: str, items: dict):
+        now = time.time()
+        rows = []
+        for key, diagnostics in items.items():
+            blob = json.dumps(diagnostics, separators=(",", ":"))
+            rows.append((key, tool, blob, len(blob) + len(key), now))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+    
+    def record(self, **deltas):
+        with self._lock:
+            for name, value in deltas.items():
+                self._db.execute(
+                    "INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                    (name, value, value))
+            self._db.commit()
+    
+    def evict(self, max_bytes: int) -> int:
+        """Drop least-recently-used entries until the cache is under 90% of max_bytes."""
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+            if total <= max_bytes:
+                return 0
+            target = total - int(max_bytes * 0.9)
+            victims, freed = [], 0
+            for key, size in self._db.execute("SELECT key, bytes FROM entries ORDER BY last_used"):
+                victims.append((key,))
+                freed += size
+                if freed >= target:
+                    break
+            self._db.executemany("DELETE FROM entries WHERE key = ?", victims)
+            self._db.commit()
+        self.record(evictions=len(victims))
+        return len(victims)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entries").fetchone()
+            values = dict(self._db.execute("SELECT name, value FROM stats").fetchall())
+        counters = {name: int(values.get(name, 0)) for name in self.STATS}
+        lookups = counters["hits"] + counters["misses"]
+        return {"entries": entries, "bytes": size, **counters,
+                "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0}
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def analyse_files(linter: dict, cwd: Path, pending: dict, fingerprint: str,
+                  cache: ResultCache = None, uncacheable: set = ()) -> dict:
+    """Diagnostics for the files in `pending` (rel -> (content hash, size)).
+    
+    Files found in the cache are answered from it (except those in
+    `uncacheable`); the rest go to one tool run whose per-file results are
+    stored back. Returns by_file, hits, linted and, on failure, error/proc.
+    """
+    outcome = {"by_file": {}, "hits": 0, "linted": 0, "error": "", "proc": None}
+    keys = {rel: ResultCache.key(fingerprint, h) for rel, (h, _) in pending.items()}
+    if cache is not None:
+        found = cache.get_many([keys[rel] for rel in pending if rel not in uncacheable])
+        saved = 0
+        for rel, (_, size) in pending.items():
+            if rel not in uncacheable and keys[rel] in found:
+                outcome["by_file"][rel] = found[keys[rel]]
+                saved += size
+        outcome["hits"] = len(outcome["by_file"])
+        cache.record(hits=outcome["hits"], misses=len(pending) - outcome["hits"], bytes_saved=saved)
+    
+    to_lint = sorted(set(pending) - set(outcome["by_file"]))
+    if not to_lint:
+        return outcome
+    by_file = {rel: [] for rel in to_lint}
+    parser = DiagnosticParser(linter["tool"], cwd,
+                              lambda d: by_file.setdefault(d.pop("file"), []).append(d))
+    cmd = targeted_cmd(linter, to_lint, json_output=True)
+    proc = run_tool(linter, cmd, cwd, files=to_lint, json_output=True, sinks=(parser.feed,))
+    parser.close()
+    outcome["proc"] = proc
+    outcome["linted"] = len(to_lint)
+    if proc["error"] or parser.error or proc["returncode"] not in (0, 1):
+        outcome["error"] = proc["error"] or clip_tail(proc["stderr"], 500) or parser.error or \
+            f"{linter['tool']} exited with {proc['returncode']}"
+        return outcome
+    for rel in to_lint:
+        outcome["by_file"][rel] = by_file[rel]
+    if cache is not None:
+        cache.put_many(linter["tool"], {keys[rel]: by_file[rel] for rel in to_lint})
+    return outcome
+
+
+def summarize_files(result: dict, linter: dict, by_file: dict, table: DiagnosticsTable = None):
+    """Fill output, counts and verdict of a per-file run from rel -> diagnostics."""
+    if table is not None:
+        add, flush = table.writer(linter["name"], linter["tool"])
+    lines = []
+    counts = Counter()
+    for rel in sorted(by_file):
+        for d in by_file[rel]:
+            counts[d["severity"]] += 1
+            d = {"file": rel, **d}
+            lines.append(format_diagnostic(d))
+            if table is not None:
+                add(d)
+    if table is not None:
+        flush()
+        result["diagnostics"] = table.summary(linter["name"])
+    _, warning_limit = max_warnings(linter.get("file_cmd", []))
+    result["output"] = "\n".join(lines)[:2000]
+    result["passed"] = counts["error"] == 0 and (
+        warning_limit is None or warning_limit < 0 or counts["warning"] <= warning_limit)
+    result["counts"] = dict(counts)
+
+
+def file_fingerprint(linter: dict, cwd: Path) -> str:
+    """Tool, tool version and config digest: everything besides file content that keys a result."""
+    spec = FILE_LINTERS[linter["tool"]]
+    version = tool_version(linter, cwd)
+    config = config_digest(cwd, spec["config_files"])
+    return f"{linter['tool']}\0{version}\0{config}"
+
+
+def run_cached(linter: dict, cwd: Path, files: list, cache: ResultCache, table: DiagnosticsTable = None) -> dict:
+    """Lint `files`, answering every file whose content is already in the shared cache."""
+    result = {
+        "name": linter["name"],
+        "passed": False,
+        "output": "",
+        "error": ""
+    }
+    pending = {}
+    for rel in files:
+        try:
+            data = (cwd / rel).read_bytes()
+        except OSError:
+            continue
+        pending[rel] = (digest(data), len(data))
+    
+    outcome = analyse_files(linter, cwd, pending, file_fingerprint(linter, cwd), cache)
+    if outcome["proc"] is not None:
+        result["logs"] = outcome["proc"]["logs"]
+    result["cache"] = {"files": len(pending), "hits": outcome["hits"], "linted": outcome["linted"]}
+    if outcome["error"]:
+        result["error"] = outcome["error"]
+        return result
+    summarize_files(result, linter, outcome["by_file"], table)
     return result
 
 
+def run_incremental(linter: dict, cwd: Path, manifest: dict, table: DiagnosticsTable = None,
+                    session: dict = None) -> dict:
+    """Lint only changed files (and their importers), reusing cached diagnostics.
+    
+    With a shared ResultCache in the session, changed files whose content was
+    seen before (e.g. after a branch switch) are answered from it too.
+    Updates manifest["linters"][name] in place; the caller persists it.
+    """
+    result = {
+        "name": linter["name"],
+        "passed": False,
+        "output": "",
+        "error": ""
+    }
+    
+    fingerprint = file_fingerprint(linter, cwd)
+    _, version, config = fingerprint.split("\0")
+    previous = manifest["linters"].get(linter["name"], {})
+    old_files = previous.get("files", {}) if (
+        previous.get("version") == version and previous.get("config") == config) else {}
+    
+    files = {}
+    changed = {}
+    sizes = {}
+    targets, result["targets"] = lint_targets(linter, cwd, session)
+    for rel in targets:
+        try:
+            data = (cwd / rel).read_bytes()
+        except OSError:
+            continue
+        h = digest(data)
+        sizes[rel] = len(data)
+        entry = old_files.get(rel)
+        if entry and entry["hash"] == h:
+            files[rel] = entry
+        else:
+            files[rel] = {"hash": h, "imports": [], "diagnostics": []}
+            changed[rel] = data.decode('utf-8', errors='replace')
+    
+    # Import edges only need recomputing for files whose content changed
+    known = set(files)
+    for rel, content in changed.items():
+        files[rel]["imports"] = resolve_imports(rel, content, known)
+    
+    # Files importing a changed or deleted file are re-linted too
+    touched = set(changed) | (set(old_files) - known)
+    to_lint = set(changed)
+    for rel, entry in files.items():
+        if touched.intersection(entry["imports"]):
+            to_lint.add(rel)
+    
+    linted = 0
+    if to_lint:
+        # Importers are re-linted for their dependency's sake: their own content may
+        # be cached, but the cache cannot know what they import changed
+        pending = {rel: (files[rel]["hash"], sizes[rel]) for rel in to_lint}
+        outcome = analyse_files(linter, cwd, pending, fingerprint, (session or {}).get("cache"),
+                                uncacheable=to_lint - set(changed))
+        linted = outcome["linted"]
+        if outcome["proc"] is not None:
+            result["logs"] = outcome["proc"]["logs"]
+        if outcome["error"]:
+            # Tool crashed or emitted something unparsable: report it and keep the old state
+            if outcome["proc"] is not None:
+                result["output"] = clip_tail(outcome["proc"]["stdout"], 2000)
+            result["error"] = outcome["error"]
+            return result
+        for rel in to_lint:
+            files[rel]["diagnostics"] = outcome["by_file"][rel]
+    
+    manifest["linters"][linter["name"]] = {"version": version, "config": config, "files": files}
+    
+    summarize_files(result, linter, {rel: entry["diagnostics"] for rel, entry in files.items()}, table)
+    result["incremental"] = {"files": len(files), "linted": linted, "reused": len(files) - linted}
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Baseline
+# ---------------------------------------------------------------------------
+
+def load_baseline(path: Path) -> dict:
+    """check key -> Counter of fingerprints; empty when the file is missing or stale."""
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != BASELINE_VERSION:
+        return {}
+    return {key: Counter(fingerprints) for key, fingerprints in data.get("checks", {}).items()}
+
+
+def save_baseline(path: Path, baseline: dict):
+    checks = {key: dict(sorted(counter.items())) for key, counter in sorted(baseline.items())}
+    path.write_text(json.dumps({"version": BASELINE_VERSION, "checks": checks}, indent=1) + "\n",
+                    encoding='utf-8')
+
+
+def fingerprint_diagnostics(rows, cwd: Path):
+    """Yield (fingerprint, diagnostic) for rows sorted by file.
+    
+    The fingerprint hashes tool, rule, file and the whitespace-normalized
+    source line (the message when the line cannot be read), never the line
+    number, so edits elsewhere in the file do not invalidate it.
+    """
+    current, lines = None, []
+    for d in rows:
+        if d["file"] != current:
+            current = d["file"]
+            try:
+                lines = (cwd / current).read_text(encoding='utf-8', errors='replace').splitlines()
+            except OSError:
+                lines = []
+        line = d["line"] or 0
+        snippet = lines[line - 1] if 0 < line <= len(lines) else d["message"] or ""
+        snippet = WHITESPACE_RE.sub(" ", snippet).strip()
+        yield digest(f"{d['tool']}\0{d['rule']}\0{d['file']}\0{snippet}".encode()), d
+
+
+def apply_baseline(linter: dict, cwd: Path, result: dict, table: DiagnosticsTable,
+                   known: Counter, update: bool = False) -> Counter:
+    """Re-judge one check against its known fingerprints; returns this run's fingerprints.
+    
+    Known diagnostics are matched as a multiset (two identical violations in a
+    file need two baseline entries), so the diff is one pass over the rows.
+    """
+    current = Counter()
+    remaining = Counter(known)
+    new = []
+    new_counts = Counter()
+    for fp, d in fingerprint_diagnostics(table.rows(linter["name"]), cwd):
+        current[fp] += 1
+        if remaining[fp] > 0:
+            remaining[fp] -= 1
+            continue
+        new_counts[d["severity"]] += 1
+        if len(new) < 50:
+            new.append(d)
+    fixed = sum(remaining.values())
+    
+    if update:
+        new, new_counts = [], Counter()
+    result["baseline"] = {"known": sum(current.values()) - sum(new_counts.values()),
+                          "new": sum(new_counts.values()), "fixed": fixed,
+                          "new_diagnostics": new}
+    # A check that failed without producing any diagnostic (crash, bad config) stays failed
+    if result["passed"] or not current:
+        return current
+    _, warning_limit = max_warnings(linter.get("file_cmd") or linter["cmd"])
+    result["passed"] = new_counts["error"] == 0 and (
+        warning_limit is None or warning_limit < 0 or new_counts["warning"] <= warning_limit)
+    result["output"] = "\n".join(format_diagnostic(d) for d in new[:20])
+    if result["passed"]:
+        result["error"] = ""
+    return current
+
+
+def judge_baseline(linter: dict, cwd: Path, session: dict, result: dict):
+    """apply_baseline for one finished check, recording its fingerprints under the check's key."""
+    state = session["baseline"]
+    key = f"{state['label']}: {linter['name']}" if state["label"] else linter["name"]
+    current = apply_baseline(linter, cwd, result, session["table"], state["known"].get(key, Counter()),
+                             state["update"])
+    if state["update"]:
+        state["known"][key] = current
+
+
+# ---------------------------------------------------------------------------
+# Warm daemon
+# ---------------------------------------------------------------------------
+
+def daemon_socket_path(project_path: Path) -> str:
+    """Socket inside the state dir, or in the temp dir when that path is too long for AF_UNIX."""
+    path = str(project_path / STATE_DIR / "daemon.sock")
+    if len(path) < 100:
+        return path
+    key = hashlib.sha1(str(project_path).encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"lint-runner-{key}.sock")
+
+
+def daemon_request(project_path: Path, request: dict, timeout: int):
+    """Send one request to the daemon; None when it is not running or fails."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(daemon_socket_path(project_path))
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        reply = json.loads(b"".join(chunks).decode('utf-8', errors='replace'))
+    except (OSError, ValueError):
+        return None
+    if reply.get("returncode") is None:
+        return None  # tool not loadable in the daemon: let the subprocess path report it
+    return {"returncode": reply["returncode"], "stdout": reply.get("stdout", ""),
+            "stderr": reply.get("stderr", ""), "error": ""}
+
+
+def daemon_options(linter: dict):
+    """Request fields that make the daemon match the linter's own command, or None if it needs a subprocess.
+    
+    The daemon lints with the project's ESLint config as-is; of the command's
+    flags it can only apply --max-warnings, so -c, --rule, --ext and the like
+    keep the linter on the subprocess path.
+    """
+    tool = linter.get("tool")
+    if tool not in DAEMON_TOOLS:
+        return None
+    cmd = linter.get("file_cmd") or linter["cmd"]
+    args = cmd[2:] if cmd[0] == "npx" else cmd[1:]
+    if tool == "tsc":
+        return {} if set(args) <= {"--noEmit"} else None
+    try:
+        args, limit = max_warnings(args)
+    except ValueError:
+        return None
+    if args not in ([], ["."]):
+        return None
+    return {"maxWarnings": limit} if limit is not None else {}
+
+
+def start_daemon(project_path: Path) -> bool:
+    """Spawn the Node worker in the background; it serves from the next request on."""
+    state_dir = ensure_state_dir(project_path)
+    try:
+        with open(state_dir / "daemon.log", "ab") as log:
+            subprocess.Popen(
+                ["node", str(DAEMON_SCRIPT), str(project_path), daemon_socket_path(project_path)],
+                cwd=str(project_path),
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                start_new_session=True,
+            )
+        return True
+    except OSError:
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Watch mode
+# ---------------------------------------------------------------------------
+
+class InotifyWatcher:
+    """Recursive inotify watch (Linux), via ctypes; new directories are added as they appear."""
+    
+    IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x2, 0x8, 0x40, 0x80
+    IN_CREATE, IN_DELETE, IN_Q_OVERFLOW, IN_ISDIR = 0x100, 0x200, 0x4000, 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")
+    
+    def __init__(self, root: Path):
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}  # watch descriptor -> relative dir
+        for rel_dir, _ in walk_dirs(root):
+            self._watch(rel_dir)
+    
+    def _watch(self, rel_dir: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(self.root / rel_dir), self.MASK)
+        if wd >= 0:
+            self.dirs[wd] = rel_dir
+    
+    def changes(self, timeout: float) -> set:
+        """Relative paths changed within `timeout` seconds; {"*"} when events were lost."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode('utf-8', errors='replace')
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                changed.add("*")
+                continue
+            if wd not in self.dirs or not name:
+                continue
+            rel = f"{self.dirs[wd]}/{name}" if self.dirs[wd] else name
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and name not in DEPENDENCY_DIRS | ARTIFACT_DIRS:
+                    self._watch(rel)
+                continue
+            changed.add(rel)
+        return changed
+    
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: compares (mtime_ns, size) snapshots of the pruned tree."""
+    
+    def __init__(self, root: Path):
+        self.root = root
+        self.snapshot = self._scan()
+    
+    def _scan(self) -> dict:
+        snapshot = {}
+        for rel_dir, entries in walk_dirs(self.root):
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        snapshot[rel] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+        return snapshot
+    
+    def changes(self, timeout: float) -> set:
+        time.sleep(min(timeout, WATCH_POLL_INTERVAL_S))
+        current = self._scan()
+        changed = {rel for rel, sig in current.items() if self.snapshot.get(rel) != sig}
+        changed |= set(self.snapshot) - set(current)
+        self.snapshot = current
+        return changed
+    
+    def close(self):
+        pass
+
+
+def make_watcher(root: Path):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root)
+
+
+def wait_for_burst(watcher) -> set:
+    """Block until something changes, then gather events until the tree is quiet."""
+    changed = set()
+    while not changed:
+        changed = watcher.changes(3600)
+    deadline = time.monotonic() + WATCH_MAX_DELAY_S
+    while time.monotonic() < deadline:
+        more = watcher.changes(WATCH_DEBOUNCE_S)
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def linter_inputs(linter: dict) -> tuple:
+    """(source extensions, config file names) a linter's verdict depends on."""
+    tool = linter.get("tool")
+    if tool in FILE_LINTERS:
+        return FILE_LINTERS[tool]["extensions"], FILE_LINTERS[tool]["config_files"]
+    if tool == "mypy":
+        return [".py", ".pyi"], TOOL_CONFIG_FILES["mypy"]
+    return JS_EXTENSIONS, TOOL_CONFIG_FILES.get(tool, ["package.json"])
+
+
+def scope_changes(plans: list, root: Path, changed: set) -> list:
+    """Tasks to re-run for a set of changed paths (relative to root).
+    
+    Per-file linters get only the touched files; whole-program checkers and
+    any linter whose config changed run in full.
+    """
+    tasks = []
+    for plan in plans:
+        prefix = plan["path"].relative_to(root).as_posix()
+        prefix = "" if prefix == "." else prefix + "/"
+        if "*" in changed:
+            local = None  # events were dropped: re-run everything
+        else:
+            local = {c[len(prefix):] for c in changed if c.startswith(prefix)}
+            if not local:
+                continue
+        plan["session"].pop("targets", None)  # files may have been added or removed
+        for linter in plan["info"]["linters"]:
+            extensions, configs = linter_inputs(linter)
+            if local is None or local.intersection(configs):
+                tasks.append((linter, plan["path"], plan["session"]))
+                continue
+            touched = sorted(f for f in local if os.path.splitext(f)[1] in extensions)
+            if not touched:
+                continue
+            if linter.get("tool") in FILE_LINTERS:
+                linter = {**linter, "only_files": touched}
+            tasks.append((linter, plan["path"], plan["session"]))
+    return tasks
+
+
+def watch(plans: list, root: Path, args):
+    """--watch loop: debounce bursts of saves and re-run only the affected linters."""
+    watcher = make_watcher(root)
+    kind = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+    print(f"\n[WATCH] Watching {root} ({kind}). Press Ctrl+C to stop.")
+    try:
+        while True:
+            changed = wait_for_burst(watcher)
+            tasks = scope_changes(plans, root, changed)
+            if not tasks:
+                continue
+            shown = ", ".join(sorted(changed)[:5]) + (" ..." if len(changed) > 5 else "")
+            print(f"\n[WATCH] {len(changed)} changed: {shown}")
+            results = run_tasks(tasks, args.jobs, args.fail_fast)
+            for (linter, path, session), result in zip(tasks, results):
+                scope = f"{len(linter['only_files'])} files" if "only_files" in linter else "full"
+                icon = "[PASS]" if result["passed"] else "[SKIP]" if result.get("cancelled") else "[FAIL]"
+                print(f"  {icon} {result['name']} ({scope}, {result['resources']['wall_s']:.2f}s)")
+                if not result["passed"]:
+                    for line in (result["error"] or result["output"]).splitlines()[:20]:
+                        print(f"      {line}")
+            for plan in plans:
+                if "manifest" in plan["session"]:
+                    save_manifest(plan["path"], plan["session"]["manifest"])
+    except KeyboardInterrupt:
+        print("\n[WATCH] Stopped.")
+    finally:
+        watcher.close()
+        for plan in plans:
+            finish_session(plan["path"], plan["session"])
+
+
+def available_memory_mb():
+    """Return available physical memory in MB, or None if it cannot be determined."""
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def max_parallel_linters(count: int, jobs: int = 0) -> int:
+    """Number of linters that may run at once.
+    
+    jobs=0 picks the CPU count; an explicit jobs value may oversubscribe CPUs
+    (linters spend much of their time in startup I/O) but never available memory.
+    """
+    limit = jobs if jobs > 0 else (os.cpu_count() or 1)
+    memory = available_memory_mb()
+    if memory is not None:
+        limit = min(limit, max(1, memory // LINTER_MEMORY_MB))
+    return max(1, min(limit, count))
+
+
+def run_check(linter: dict, cwd: Path, session: dict = None) -> dict:
+    """Run one linter in the mode selected for this run and account for its resources.
+    
+    session holds per-run shared state: "manifest" (incremental mode) and
+    "table" (structured diagnostics).
+    """
+    usage = {"user_s": 0.0, "sys_s": 0.0, "max_rss_kb": 0, "processes": 0}
+    _accounting.usage = usage
+    start = time.perf_counter()
+    try:
+        if _cancel.is_set():
+            usage["cancelled"] = True
+            result = {"name": linter["name"], "passed": False, "output": "", "error": "Cancelled before start"}
+        else:
+            result = _run_check_mode(linter, cwd, session)
+    finally:
+        _accounting.usage = None
+    if usage.get("cancelled"):
+        result["cancelled"] = True
+        result["passed"] = False
+    resources = {
+        "start_s": round(start - RUN_EPOCH, 6),
+        "wall_s": round(time.perf_counter() - start, 6),
+        "thread": threading.current_thread().name,
+    }
+    if hasattr(os, "wait4"):
+        resources.update(user_s=round(usage["user_s"], 6), sys_s=round(usage["sys_s"], 6),
+                         max_rss_kb=usage["max_rss_kb"], processes=usage["processes"])
+    result["resources"] = resources
+    return result
+
+
+def write_trace(path: Path, tasks: list, results: list):
+    """Write checks as Chrome trace-event "complete" slices, one track per worker thread."""
+    pid = os.getpid()
+    lanes = {}
+    events = []
+    for (linter, cwd, _), result in zip(tasks, results):
+        res = result.get("resources")
+        if not res:
+            continue
+        tid = lanes.setdefault(res["thread"], len(lanes) + 1)
+        args = {k: v for k, v in res.items() if k not in ("start_s", "wall_s", "thread")}
+        args.update(passed=result["passed"], project=str(cwd))
+        events.append({
+            "name": result["name"],
+            "cat": linter.get("tool") or "lint",
+            "ph": "X",
+            "ts": round(res["start_s"] * 1e6),
+            "dur": round(res["wall_s"] * 1e6),
+            "pid": pid,
+            "tid": tid,
+            "args": args,
+        })
+    events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "lint_runner"}})
+    for thread, tid in lanes.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}})
+    path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding='utf-8')
+
+
+def _run_check_mode(linter: dict, cwd: Path, session: dict = None) -> dict:
+    session = session if session is not None else {}
+    manifest = session.get("manifest")
+    table = session.get("table")
+    if manifest is not None and linter.get("tool") in FILE_LINTERS:
+        return run_incremental(linter, cwd, manifest, table, session)
+    
+    files = stats = None
+    only_files = linter.get("only_files")
+    if linter.get("tool") in FILE_LINTERS:
+        if session.get("prune", True):
+            files, stats = lint_targets(linter, cwd, session)
+            if only_files is not None:
+                files = sorted(set(files).intersection(only_files))
+        elif only_files is not None:
+            files = [f for f in only_files if (cwd / f).is_file()]
+        if files is not None and not files:
+            return {"name": linter["name"], "passed": True, "output": "No files to lint",
+                    "error": "", "targets": stats}
+    if session.get("cache") is not None and files:
+        result = run_cached(linter, cwd, files, session["cache"], table)
+    elif linter.get("tool") == "eslint" and files and len(files) > 1 and session.get("shards", 1) > 1:
+        result = run_sharded(linter, cwd, files, session["shards"], table)
+    elif table is not None and linter.get("tool") in ("eslint", "ruff", "mypy", "tsc"):
+        result = run_structured(linter, cwd, table, files)
+    else:
+        result = run_linter(linter, cwd, files)
+    if stats is not None:
+        result["targets"] = stats
+    return result
+
+
+def run_tasks(tasks: list, jobs: int = 1, fail_fast: bool = False) -> list:
+    """Run (linter, cwd, session) tasks with at most `jobs` in flight; results keep task order.
+    
+    All packages of a monorepo share this one pool, so the worker budget is global.
+    With fail_fast, the first failing check cancels every other one (see
+    cancel_inflight); the cancelled results carry "cancelled": True. A session
+    with a "baseline" has each result re-judged before that decision.
+    """
+    _cancel.clear()
+    
+    def check(linter, cwd, session):
+        result = run_check(linter, cwd, session)
+        # Judge against the baseline first, so only new diagnostics can cancel the run
+        if "baseline" in session and "diagnostics" in result and not result.get("cancelled"):
+            judge_baseline(linter, cwd, session, result)
+        if fail_fast and not result["passed"] and not result.get("cancelled"):
+            cancel_inflight()
+        return result
+    
+    workers = max_parallel_linters(len(tasks), jobs)
+    if workers == 1:
+        return [check(*task) for task in tasks]
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(check, *task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def prepare_session(project_path: Path, linters: list, args) -> dict:
+    """Apply CLI options to a project's linters and build its per-run session state."""
+    if args.timeout is not None:
+        for linter in linters:
+            linter["timeout"] = args.timeout
+    
+    if linters and not args.no_resolve:
+        saved_ms = resolve_linters(project_path, linters, args.measure_startup)
+        for linter in linters:
+            if "resolved" in linter:
+                entry = linter["cmd"][0]
+                try:
+                    entry = Path(entry).relative_to(project_path).as_posix()
+                except ValueError:
+                    pass
+                print(f"Resolved: {linter['name']} -> {entry} (was {linter['resolved']['from']})")
+        if saved_ms:
+            print(f"Direct exec: ~{saved_ms} ms of npm/npx startup saved per run")
+    
+    if args.daemon and any(l.get("tool") in DAEMON_TOOLS for l in linters):
+        if daemon_request(project_path, {"op": "ping"}, 5) is not None:
+            print("Daemon: warm")
+        elif start_daemon(project_path):
+            print("Daemon: starting (this run falls back to subprocesses)")
+        else:
+            print("Daemon: unavailable (node not found), using subprocesses")
+        for linter in linters:
+            options = daemon_options(linter)
+            linter["daemon"] = options is not None
+            if linter["daemon"]:
+                linter["daemon_options"] = options
+            elif linter.get("tool") in DAEMON_TOOLS:
+                print(f"Daemon: {linter['name']} has flags the daemon cannot apply, using a subprocess")
+    
+    session = {"prune": not args.no_prune, "shards": args.shards}
+    if linters and args.incremental:
+        session["manifest"] = load_manifest(project_path)
+    if linters and (args.structured or args.baseline or args.update_baseline):
+        session["table"] = DiagnosticsTable(ensure_state_dir(project_path) / "diagnostics.db")
+    if linters and args.cache:
+        session["cache"] = ResultCache(cache_dir() / "results.db")
+        session["cache_bytes"] = args.cache_size * 1024 * 1024
+    return session
+
+
+def finish_session(project_path: Path, session: dict):
+    """Persist and close whatever per-run state the session opened."""
+    if "manifest" in session:
+        save_manifest(project_path, session["manifest"])
+    if "table" in session:
+        session["table"].close()
+    if "cache" in session:
+        session["cache"].evict(session["cache_bytes"])
+        session["cache"].close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Unified linting and type checking")
+    parser.add_argument("project_path", nargs="?", default=".")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="max concurrent linters (0 = one per CPU; always capped by memory)")
+    parser.add_argument("--all", action="store_true",
+                        help="discover and lint every sub-project under project_path")
+    parser.add_argument("--timeout", type=int, default=None,
+                        help=f"per-linter timeout in seconds (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-lint changed files, reusing cached diagnostics")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run eslint/tsc through a warm background worker")
+    parser.add_argument("--stop-daemon", action="store_true",
+                        help="shut down the background worker and exit")
+    parser.add_argument("--structured", action="store_true",
+                        help="parse machine-readable reports into .lint-runner/diagnostics.db")
+    parser.add_argument("--no-prune", action="store_true",
+                        help="let eslint/ruff discover files themselves")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep watching and re-run affected linters on change")
+    parser.add_argument("--shards", type=int, default=1, metavar="N",
+                        help="run eslint as N size-balanced concurrent shards")
+    parser.add_argument("--cache", action="store_true",
+                        help="answer unchanged files from the shared SQLite result cache")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_MB, metavar="MB",
+                        help=f"evict the cache down to this size (default: {DEFAULT_CACHE_MB})")
+    parser.add_argument("--cache-stats", action="store_true",
+                        help="print result cache statistics and exit")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="cancel the remaining checks as soon as one fails")
+    parser.add_argument("--baseline", nargs="?", const=BASELINE_FILE, metavar="FILE",
+                        help=f"fail only on diagnostics not in the baseline (default: {BASELINE_FILE})")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="rewrite the baseline from this run's diagnostics")
+    parser.add_argument("--no-resolve", action="store_true",
+                        help="launch tools through npx/npm/PATH instead of their resolved entry points")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="time the npx/npm startup that resolving saves (two extra tool starts, cached)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write a Chrome trace-event / Perfetto file of the run")
+    parser.add_argument("--query", action="append", metavar="KEY=VALUE",
+                        help=f"print stored diagnostics and exit ({', '.join(DiagnosticsTable.FILTERS)})")
+    return parser.parse_args(argv)
+
+
 def main():
-    project_path = Path(sys.argv[1] if len(sys.argv) > 1 else ".").resolve()
+    args = parse_args()
+    project_path = Path(args.project_path).resolve()
+    
+    if args.stop_daemon:
+        stopped = daemon_request(project_path, {"op": "shutdown"}, 10) is not None
+        print("Lint daemon stopped." if stopped else "Lint daemon is not running.")
+        sys.exit(0)
+    
+    if args.cache_stats:
+        path = cache_dir() / "results.db"
+        if not path.exists():
+            print(f"No result cache at {path}")
+            sys.exit(0)
+        cache = ResultCache(path)
+        stats = cache.stats()
+        cache.close()
+        print(f"Result cache: {path}")
+        print(f"  Entries:     {stats['entries']} ({stats['bytes'] / 1024 / 1024:.1f} MB)")
+        print(f"  Hit rate:    {stats['hit_rate'] * 100:.1f}% ({stats['hits']} hits, {stats['misses']} misses)")
+        print(f"  Bytes saved: {stats['bytes_saved'] / 1024 / 1024:.1f} MB of source not re-analysed")
+        print(f"  Evictions:   {stats['evictions']}")
+        print(json.dumps({"script": "lint_runner", "cache": stats}, indent=2))
+        sys.exit(0)
+    
+    if args.query is not None:
+        filters = dict(q.split("=", 1) for q in args.query if "=" in q)
+        unknown = set(filters) - set(DiagnosticsTable.FILTERS)
+        db_path = project_path / STATE_DIR / "diagnostics.db"
+        if unknown or not db_path.exists():
+            print(f"Unknown filter: {', '.join(sorted(unknown))}" if unknown
+                  else "No diagnostics stored yet; run with --structured first.")
+            sys.exit(2)
+        table = DiagnosticsTable(db_path)
+        rows = table.query(filters, limit=1000)
+        table.close()
+        for d in rows:
+            print(f"[{d['check_name']}] {format_diagnostic(d)}")
+        print(f"{len(rows)} diagnostics")
+        sys.exit(0)
     
     print(f"\n{'='*60}")
     print(f"[LINT RUNNER] Unified Linting")
@@ -110,18 +2361,32 @@ def main():
     print(f"Project: {project_path}")
     print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    # Detect project type
-    project_info = detect_project_type(project_path)
-    print(f"Type: {project_info['type']}")
-    print(f"Linters: {len(project_info['linters'])}")
+    if args.all:
+        package_paths = [project_path / rel for rel in discover_projects(project_path)]
+        print(f"Packages: {len(package_paths)}")
+    else:
+        package_paths = [project_path]
+    
+    # Detect project type and set up per-package run state
+    plans = []
+    for path in package_paths:
+        project_info = detect_project_type(path)
+        label = path.relative_to(project_path).as_posix() if args.all else None
+        if args.all:
+            print(f"  {label}: {project_info['type']}, {len(project_info['linters'])} linters")
+        else:
+            print(f"Type: {project_info['type']}")
+            print(f"Linters: {len(project_info['linters'])}")
+        plans.append({"path": path, "label": label, "info": project_info,
+                      "session": prepare_session(path, project_info["linters"], args)})
     print("-"*60)
     
-    if not project_info["linters"]:
+    if not any(plan["info"]["linters"] for plan in plans):
         print("No linters found for this project type.")
         output = {
             "script": "lint_runner",
             "project": str(project_path),
-            "type": project_info["type"],
+            "type": plans[0]["info"]["type"] if plans else "unknown",
             "checks": [],
             "passed": True,
             "message": "No linters configured"
@@ -129,19 +2394,60 @@ def main():
         print(json.dumps(output, indent=2))
         sys.exit(0)
     
-    # Run each linter
-    results = []
+    # One baseline file covers every package; checks are keyed "<package>: <linter>" under --all
+    if args.baseline or args.update_baseline:
+        baseline_path = project_path / (args.baseline or BASELINE_FILE)
+        baseline = load_baseline(baseline_path)
+        for plan in plans:
+            plan["session"]["baseline"] = {"known": baseline, "label": plan["label"],
+                                           "update": args.update_baseline}
+    
+    # Run every package's linters from one pool (concurrently when --jobs allows it)
+    tasks = [(linter, plan["path"], plan["session"]) for plan in plans for linter in plan["info"]["linters"]]
+    workers = max_parallel_linters(len(tasks), args.jobs)
+    print(f"\nRunning: {len(tasks)} checks ({workers} at a time)...")
+    results = run_tasks(tasks, args.jobs, args.fail_fast)
+    if args.update_baseline:
+        save_baseline(baseline_path, baseline)
+        print(f"Baseline written to {baseline_path} "
+              f"({sum(sum(c.values()) for c in baseline.values())} known diagnostics)")
+    if not args.watch:
+        for plan in plans:
+            finish_session(plan["path"], plan["session"])
+    if args.trace:
+        write_trace(Path(args.trace), tasks, results)
+        print(f"Trace written to {args.trace}")
     all_passed = True
     
-    for linter in project_info["linters"]:
-        print(f"\nRunning: {linter['name']}...")
-        result = run_linter(linter, project_path)
-        results.append(result)
-        
+    for (linter, path, _), result in zip(tasks, results):
+        name = linter["name"] if not args.all else f"{path.relative_to(project_path).as_posix()}: {linter['name']}"
+        if "targets" in result:
+            t = result["targets"]
+            print(f"  {name}: {t['files']} files ({t['bytes'] // 1024} KB), skipped "
+                  f"{t['skipped_files']} files ({t['skipped_bytes'] // 1024} KB) in ignored paths")
+        if "incremental" in result:
+            inc = result["incremental"]
+            print(f"  {name}: linted {inc['linted']}/{inc['files']} files, {inc['reused']} from cache")
+        if "baseline" in result:
+            b = result["baseline"]
+            print(f"  {name}: {b['new']} new, {b['known']} known from baseline, {b['fixed']} fixed")
+        if "cache" in result:
+            c = result["cache"]
+            print(f"  {name}: {c['hits']}/{c['files']} files from result cache, linted {c['linted']}")
+        counts = ", ".join(f"{n} {kind}" for kind, n in sorted(result.get("counts", {}).items()))
+        suffix = f" ({counts})" if counts else ""
+        res = result["resources"]
+        cost = f"{res['wall_s']:.2f}s wall"
+        if res.get("processes"):
+            cost += f", {res['user_s'] + res['sys_s']:.2f}s CPU, {res['max_rss_kb'] // 1024} MB peak RSS"
+        suffix += f" [{cost}]"
         if result["passed"]:
-            print(f"  [PASS] {linter['name']}")
+            print(f"  [PASS] {name}{suffix}")
+        elif result.get("cancelled"):
+            print(f"  [SKIP] {name}{suffix} cancelled by --fail-fast")
+            all_passed = False
         else:
-            print(f"  [FAIL] {linter['name']}")
+            print(f"  [FAIL] {name}{suffix}")
             if result["error"]:
                 print(f"  Error: {result['error'][:200]}")
             all_passed = False
@@ -151,17 +2457,46 @@ def main():
     print("SUMMARY")
     print("="*60)
     
-    for r in results:
-        icon = "[PASS]" if r["passed"] else "[FAIL]"
-        print(f"{icon} {r['name']}")
+    for (linter, path, _), r in zip(tasks, results):
+        icon = "[PASS]" if r["passed"] else "[SKIP]" if r.get("cancelled") else "[FAIL]"
+        prefix = f"{path.relative_to(project_path).as_posix()}: " if args.all else ""
+        print(f"{icon} {prefix}{r['name']}")
+    cancelled = [r["name"] for r in results if r.get("cancelled")]
+    if cancelled:
+        print(f"\nFail-fast: {len(results) - len(cancelled)} completed, {len(cancelled)} cancelled")
+    
+    if args.watch:
+        watch(plans, project_path, args)
+        sys.exit(0)
     
     output = {
         "script": "lint_runner",
         "project": str(project_path),
-        "type": project_info["type"],
+        "type": plans[0]["info"]["type"],
         "checks": results,
         "passed": all_passed
     }
+    saved_ms = sum(linter.get("resolved", {}).get("saved_ms", 0)
+                   for (linter, _, _), r in zip(tasks, results) if r["resources"].get("processes", 1))
+    if saved_ms:
+        output["startup_saved_ms"] = saved_ms
+    if args.fail_fast:
+        output["completed"] = [r["name"] for r in results if not r.get("cancelled")]
+        output["cancelled"] = cancelled
+    if args.all:
+        packages = []
+        offset = 0
+        for plan in plans:
+            checks = results[offset:offset + len(plan["info"]["linters"])]
+            offset += len(checks)
+            for check in checks:
+                check["package"] = plan["label"]
+            packages.append({"path": plan["label"], "type": plan["info"]["type"],
+                             "checks": [c["name"] for c in checks],
+                             "failed": [c["name"] for c in checks if not c["passed"]],
+                             "passed": all(c["passed"] for c in checks)})
+        output["type"] = "monorepo"
+        output["packages"] = packages
     
     print("\n" + json.dumps(output, indent=2))
     
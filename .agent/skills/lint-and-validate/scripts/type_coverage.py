@@ -3,11 +3,23 @@
 Type Coverage Checker - Measures TypeScript/Python type coverage.
 Identifies untyped functions, any usage, and type safety issues.
 """
+import os
 import sys
+import argparse
 import re
+import ast
+import json
+import time
+import heapq
+import mmap
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
 
+# Same .gitignore semantics as lint_runner.py's target walk
+from ignore_rules import IgnoreRules
+
 # Fix Windows console encoding for Unicode output
 try:
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -15,40 +27,502 @@ try:
 except AttributeError:
     pass  # Python < 3.7
 
-def check_typescript_coverage(project_path: Path) -> dict:
+SOURCE_EXTENSIONS = ('.ts', '.tsx', '.py')
+
+# Never entered by the walk: dependencies, virtualenvs, VCS and tool caches
+EXCLUDED_DIRS = {
+    'node_modules', '.git', '__pycache__', 'venv', '.venv', '.tox', '.nox',
+    '.mypy_cache', '.ruff_cache', '.pytest_cache', '.next', '.nuxt', '.lint-runner',
+}
+
+def walk_sources(project_path: Path) -> dict:
+    """Collect .ts/.tsx/.py files in one os.scandir walk.
+    
+    Excluded and gitignored directories are pruned without being entered,
+    and .d.ts declaration files are skipped. Returns extension -> sorted paths.
+    """
+    found = {ext: [] for ext in SOURCE_EXTENSIONS}
+    rules = IgnoreRules()
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        abs_dir = project_path / rel_dir if rel_dir else project_path
+        try:
+            rules.add((abs_dir / '.gitignore').read_text(encoding='utf-8', errors='ignore').splitlines(), rel_dir)
+        except OSError:
+            pass
+        try:
+            entries = list(os.scandir(abs_dir))
+        except OSError:
+            continue
+        for entry in entries:
+            rel = rel_dir + '/' + entry.name if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDED_DIRS and not rules.ignored(rel, True):
+                        stack.append(rel)
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            ext = os.path.splitext(entry.name)[1]
+            if ext in found and not entry.name.endswith('.d.ts') and not rules.ignored(rel, False):
+                found[ext].append(Path(entry.path))
+    for paths in found.values():
+        paths.sort()
+    return found
+
+# Per-file results persist in <project>/.lint-runner/, next to lint_runner.py's state
+STATE_DIR = '.lint-runner'
+CACHE_FILE = 'type_coverage.json'
+CACHE_VERSION = 2
+# Bump when an analyser counts differently, so its cached results are dropped
+TS_ANALYSER_VERSION = 3
+PY_ANALYSER_VERSION = 1
+
+def ensure_state_dir(state_dir: Path):
+    """Create the state directory, self-ignored so it never shows up in git status."""
+    state_dir.mkdir(exist_ok=True)
+    ignore_file = state_dir / '.gitignore'
+    if not ignore_file.exists():
+        ignore_file.write_text('*\n', encoding='utf-8')
+
+class CoverageCache:
+    """Per-file analysis results keyed by (project-relative path, size, mtime_ns, analyser version).
+    
+    split() stats the files and hands back what is still valid, put() records
+    fresh results and save() writes the entries of the files seen this run,
+    so deleted files drop out. `commit` is the git HEAD the entries were
+    last saved at, so --since can find the files changed since then.
+    Keys are POSIX paths relative to the project, so the same tree hits the
+    same entries whichever directory or target spelling it is checked from.
+    """
+    
+    def __init__(self, project_path: Path, path: Path = None):
+        self.project_path = project_path
+        self.path = path or project_path / STATE_DIR / CACHE_FILE
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = {}
+        valid = data.get('version') == CACHE_VERSION
+        self.entries = data.get('files', {}) if valid else {}
+        self.commit = data.get('commit') if valid else None
+        self.seen = {}
+        self.stamps = {}
+        self.hits = 0
+        self.misses = 0
+        # A file written after this may change again within one mtime tick: never cache it
+        self.started_ns = time.time_ns()
+    
+    def key(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.project_path).as_posix()
+        except ValueError:
+            return path.as_posix()
+    
+    def split(self, paths: list, version: int) -> tuple:
+        """Partition paths into ({path: cached counts}, [stale paths])."""
+        cached = {}
+        stale = []
+        for path in paths:
+            key = self.key(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                stale.append(path)
+                continue
+            stamp = [st.st_size, st.st_mtime_ns, version]
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                cached[path] = entry[1]
+                self.seen[key] = entry
+                self.hits += 1
+            else:
+                self.stamps[key] = stamp
+                stale.append(path)
+                self.misses += 1
+        return cached, stale
+    
+    def put(self, path: Path, counts):
+        key = self.key(path)
+        stamp = self.stamps.pop(key, None)
+        if stamp is not None and stamp[1] < self.started_ns:
+            self.seen[key] = [stamp, counts]
+    
+    def save(self, commit: str = None):
+        if self.seen == self.entries and commit == self.commit:
+            return
+        try:
+            ensure_state_dir(self.path.parent)
+            tmp = self.path.with_suffix('.tmp')
+            tmp.write_text(json.dumps({'version': CACHE_VERSION, 'commit': commit, 'files': self.seen}), encoding='utf-8')
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # read-only checkout: run uncached
+
+INDEX_FILE = 'type_coverage_index.jsonl'
+TREND_SHOWN = 5
+
+def _coverage(counts: dict):
+    functions = counts.get('typed_functions', 0) + counts.get('untyped_functions', 0)
+    return round(counts['typed_functions'] / functions * 100, 1) if functions else None
+
+def load_index_dirs(path: Path) -> dict:
+    """{(lang, dir): coverage} from the directory lines of an index; {} if there is none."""
+    dirs = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('{"kind": "dir"'):
+                    record = json.loads(line)
+                    dirs[record['lang'], record['path']] = record['coverage']
+    except (OSError, ValueError, KeyError):
+        return {}
+    return dirs
+
+class CoverageIndex:
+    """Per-file coverage records and per-directory rollups, streamed to a JSON Lines file.
+    
+    File lines are {"kind": "file", "lang", "path", <counts>}. Directory lines
+    follow at the end, one per (lang, directory) with the summed counts of all
+    files below it, "coverage" (typed functions in percent) and "delta"
+    against the index this one replaces (null for new directories).
+    """
+    
+    def __init__(self, project_path: Path, path: Path = None):
+        self.project_path = project_path
+        self.path = path or project_path / STATE_DIR / INDEX_FILE
+        self.previous = load_index_dirs(self.path)
+        self.dirs = {}
+        self.trend = []
+        self.out = None
+        try:
+            if path is None:
+                ensure_state_dir(self.path.parent)
+            self.out = open(self.path.with_suffix('.tmp'), 'w', encoding='utf-8')
+        except OSError:
+            pass  # read-only checkout: the rollups are still computed
+    
+    def add(self, lang: str, file_path: Path, counts: dict):
+        try:
+            rel = file_path.relative_to(self.project_path).as_posix()
+        except ValueError:
+            rel = file_path.as_posix()
+        if self.out:
+            self.out.write(json.dumps({'kind': 'file', 'lang': lang, 'path': rel, **counts}) + '\n')
+        parts = rel.split('/')[:-1]
+        for depth in range(len(parts) + 1):
+            totals = self.dirs.setdefault((lang, '/'.join(parts[:depth]) or '.'), {})
+            for name, value in counts.items():
+                totals[name] = totals.get(name, 0) + value
+    
+    def close(self):
+        """Write the directory rollups, replace the previous index and fill self.trend.
+        
+        self.trend lists (delta, lang, dir, before, after) for every directory
+        whose coverage changed, worst regression first.
+        """
+        for (lang, directory), totals in sorted(self.dirs.items()):
+            coverage = _coverage(totals)
+            before = self.previous.get((lang, directory))
+            delta = None if before is None or coverage is None else round(coverage - before, 1)
+            if delta:
+                self.trend.append((delta, lang, directory, before, coverage))
+            if self.out:
+                self.out.write(json.dumps({'kind': 'dir', 'lang': lang, 'path': directory, **totals,
+                                           'coverage': coverage, 'delta': delta}) + '\n')
+        self.trend.sort()
+        if self.out:
+            self.out.close()
+            try:
+                os.replace(self.out.name, self.path)
+            except OSError:
+                pass
+
+def git_changed_files(project_path: Path, ref: str):
+    """Paths relative to project_path changed since ref, uncommitted and untracked ones included.
+    
+    None when git is unavailable or the ref is unknown. Renames are listed as a
+    deletion plus an addition, so the old path drops out too.
+    """
+    commands = (
+        ['git', '-C', str(project_path), 'diff', '--name-only', '--no-renames', '--relative', '-z', ref, '--'],
+        ['git', '-C', str(project_path), 'ls-files', '--others', '--exclude-standard', '-z'],
+    )
+    changed = set()
+    for cmd in commands:
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if proc.returncode != 0:
+            return None
+        changed.update(name for name in proc.stdout.split('\0') if name)
+    return sorted(changed)
+
+def git_head(project_path: Path):
+    """The commit checked out in project_path; None outside git."""
+    try:
+        proc = subprocess.run(['git', '-C', str(project_path), 'rev-parse', 'HEAD'],
+                              capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+def changed_sources(project_path: Path, changed: list, cache: CoverageCache) -> dict:
+    """walk_sources() for --since without walking: the cached files plus the changed ones.
+    
+    changed must cover everything changed since the cache's commit, so files
+    added since then are picked up; the cached files are still stat'ed by
+    split(), and only those that differ from their entry are re-analysed.
+    """
+    paths = {key: project_path / key for key in cache.entries}
+    for name in changed:
+        path = project_path / name
+        paths.pop(name, None)
+        excluded = any(part in EXCLUDED_DIRS for part in Path(name).parts[:-1])
+        if excluded or name.endswith('.d.ts') or path.suffix not in SOURCE_EXTENSIONS:
+            continue
+        if path.is_file():
+            paths[name] = path
+    found = {ext: [] for ext in SOURCE_EXTENSIONS}
+    for path in paths.values():
+        if path.suffix in found:
+            found[path.suffix].append(path)
+    for ext_paths in found.values():
+        ext_paths.sort()
+    return found
+
+# Reads mostly wait on the disk or network with the GIL released, so a few
+# threads overlap them with the analysis running in the main thread
+PREFETCH_THREADS = 8
+PREFETCH_AHEAD = 32
+PREFETCH_MAX_BYTES = 64 << 20
+
+def read_bytes(path: Path, limit: int = None):
+    """The file's bytes; None if it is unreadable or has `limit` bytes or more."""
+    try:
+        if limit is not None and path.stat().st_size >= limit:
+            return None
+        return path.read_bytes()
+    except OSError:
+        return None
+
+def prefetch(paths: list, read=read_bytes):
+    """Yield (path, read(path)) in path order while a thread pool reads ahead.
+    
+    At most PREFETCH_AHEAD reads are queued, and none is added while the
+    finished but not yet consumed ones hold PREFETCH_MAX_BYTES, so read-ahead
+    memory stays bounded however slow the consumer is.
+    """
+    if len(paths) < 2:
+        yield from ((path, read(path)) for path in paths)
+        return
+    # Imported here: it costs more than a warm-cache run itself
+    from concurrent.futures import ThreadPoolExecutor
+    remaining = iter(paths)
+    pending = deque()
+    buffered = [0]  # bytes read but not consumed yet, kept by the reader threads
+    lock = threading.Lock()
+    
+    def account(future):
+        with lock:
+            buffered[0] += len(future.result() or b'')
+    
+    with ThreadPoolExecutor(max_workers=PREFETCH_THREADS) as pool:
+        while True:
+            while len(pending) < PREFETCH_AHEAD and buffered[0] < PREFETCH_MAX_BYTES:
+                path = next(remaining, None)
+                if path is None:
+                    break
+                future = pool.submit(read, path)
+                future.add_done_callback(account)
+                pending.append((path, future))
+            if not pending:
+                return
+            path, future = pending.popleft()
+            data = future.result()
+            with lock:
+                buffered[0] -= len(data or b'')
+            yield path, data
+
+def _with_fresh(cached: dict, stale: list, fresh, cache: CoverageCache = None):
+    """Cached (path, counts) pairs followed by the fresh ones, recorded in the cache."""
+    yield from cached.items()
+    for path, counts in zip(stale, fresh):
+        if cache:
+            cache.put(path, counts)
+        yield path, counts
+
+# JS/TS coverage is counted by a few literal-prefixed regex passes, the only
+# kind CPython's re skips through quickly. Comments and template literals are
+# cut out first with str.find so nothing inside them is counted; string
+# literals are not lexed, as code seldom quotes function heads or annotations.
+# Arrow functions and method definitions are matched backwards from their `=>`
+# and `) {` anchors over the reversed code, so only the parameter list and head
+# in front of each anchor are examined; an empty group marks an untyped one.
+TS_METHOD_MODIFIERS = ('async', 'static', 'get', 'set', 'public', 'private', 'protected', 'readonly',
+                       'override', 'abstract')
+TS_NOT_METHODS = ('if', 'for', 'while', 'switch', 'catch', 'with', 'return', 'typeof', 'new', 'await',
+                  'yield', 'super', 'import', 'function', 'delete', 'void', 'throw', 'case')
+
+def _reversed_words(words: tuple) -> str:
+    return '|'.join(word[::-1] for word in words)
+
+# A parameter list read backwards from its ')' to its '(', stopping at a top-level ':'
+TS_PARAMS_REV = r'[^():{}]*(?:(?:\}[^{}]*\{|\)[^()]*\()[^():{}]*)*'
+TS_NAME_REV = r'[\w$]*[A-Za-z_$](?![\w$])'
+# `(params) =>` or `x =>`; group 1 is ':' when a parameter is annotated
+TS_ARROW_REV = r'>=\s*(?:\)' + TS_PARAMS_REV + r'(:)?|[\w$]+(?![\w$])(?!\s*:))'
+# `name(params) {` or `function name(params) {` with an annotated parameter in group 1;
+# control statements (`if (x) {`) and calls are not method heads
+TS_METHOD_REV = (
+    r'\{\s*\)' + TS_PARAMS_REV + r'(?:(:)[^()]*(?:\)[^()]*\([^()]*)*)?\(\s*(?:>[^<>()]*<\s*)?'
+    r'(?:(?!(?:%s)(?![\w$]))%s(?:\s*\*)?(?:\s+(?:%s)(?![\w$]))*\s*(?:[{};,)]|\Z)'
+    r'|(?:%s\s*)?\*?\s*noitcnuf(?![\w$]))'
+    % (_reversed_words(TS_NOT_METHODS), TS_NAME_REV, _reversed_words(TS_METHOD_MODIFIERS), TS_NAME_REV)
+)
+# A return type annotation, `): Type {` or `): Type =>`; read forwards
+TS_RETURN = r'\):[^{};=()]*(?:\{|=>)'
+# `any` in a type position: after ':', 'as', '<', '|' or '&', or in `any>` / `any[]`
+TS_ANY_REV = r'yna(?<![\w$]yna)(?![\w$.])(?:(?=\s*(?:[:<|&]|sa(?![\w$])))|(?<=>yna)|(?<=\]\[yna))'
+# The patterns over str, and over bytes for memory-mapped files; indexed by isinstance(text, str)
+TS_PATTERNS = {True: tuple(re.compile(p) for p in (TS_ARROW_REV, TS_METHOD_REV, TS_RETURN, TS_ANY_REV))}
+TS_PATTERNS[False] = tuple(re.compile(p.pattern.encode()) for p in TS_PATTERNS[True])
+# '`', '/*', '*/', '//', newline, backslash, space, chars before a '//' that is no comment
+# (URLs, strings) and before a '/*' that is no comment (globs, regexes)
+TS_NEEDLES = {True: ('`', '/*', '*/', '//', '\n', '\\', ' ', ':\'"', '*/.\'"')}
+TS_NEEDLES[False] = tuple(needle.encode() for needle in TS_NEEDLES[True])
+# Code is matched in pieces of about this size, bounding the copies taken of a mapped file
+TS_CHUNK = 1 << 20
+# Files from this size on are scanned from a read-only mmap instead of being read whole
+TS_MMAP_THRESHOLD = 4 << 20
+
+def _ts_regions(text):
+    """(start, end) of the comments and template literals of text, in order."""
+    tick_, block_, close_, line_, newline, escape, _, url_chars, glob_chars = TS_NEEDLES[isinstance(text, str)]
+    size = len(text)
+
+    def find(needle, pos):
+        at = text.find(needle, pos)
+        return size if at < 0 else at
+
+    tick, block, line = find(tick_, 0), find(block_, 0), find(line_, 0)
+    while True:
+        start = min(tick, block, line)
+        if start == size:
+            return
+        prev = text[start - 1:start]
+        if start == tick:
+            end = find(tick_, start + 1)
+            while end < size and text[end - 1:end] == escape and text[end - 2:end - 1] != escape:
+                end = find(tick_, end + 1)
+            end = min(end + 1, size)
+        elif start == block:
+            if start and (prev.isalnum() or prev in glob_chars):
+                block = find(block_, start + 2)
+                continue
+            end = min(find(close_, start + 2) + 2, size)
+        else:
+            if start and prev in url_chars:
+                line = find(line_, start + 2)
+                continue
+            end = find(newline, start + 2)
+        yield start, end
+        if tick < end:
+            tick = find(tick_, end)
+        if block < end:
+            block = find(block_, end)
+        if line < end:
+            line = find(line_, end)
+
+def _ts_code(text):
+    """The code of text with comments and templates cut out, in pieces of about TS_CHUNK."""
+    needles = TS_NEEDLES[isinstance(text, str)]
+    newline, space = needles[4], needles[6]
+    parts, size, pos = [], 0, 0
+    for start, end in [*_ts_regions(text), (len(text), len(text))]:
+        while start - pos > TS_CHUNK:
+            cut = text.find(newline, pos + TS_CHUNK, start)
+            if cut < 0:
+                break
+            parts.append(text[pos:cut])
+            yield space.join(parts)
+            parts, size, pos = [], 0, cut
+        parts.append(text[pos:start])
+        size += start - pos
+        if size >= TS_CHUNK:
+            yield space.join(parts)
+            parts, size = [], 0
+        pos = end
+    if parts:
+        yield space.join(parts)
+
+def scan_typescript(text) -> dict:
+    """Count `any` types and typed/untyped functions of JS/TS source.
+    
+    Functions are `function` declarations/expressions, arrow functions and
+    method definitions; a function is typed when it annotates a parameter or
+    its return type. Comments and template literals are skipped whole.
+    text is a str, or bytes / an mmap scanned with the byte patterns.
+    """
+    stats = {'any_count': 0, 'typed_functions': 0, 'untyped_functions': 0}
+    arrow_re, method_re, return_re, any_re = TS_PATTERNS[isinstance(text, str)]
+    for code in _ts_code(text):
+        reverse = code[::-1]
+        heads = arrow_re.findall(reverse) + method_re.findall(reverse)
+        untyped = heads.count(code[:0])
+        stats['untyped_functions'] += untyped
+        stats['typed_functions'] += len(heads) - untyped + len(return_re.findall(code))
+        stats['any_count'] += len(any_re.findall(reverse))
+    return stats
+
+def read_typescript(path: Path):
+    """Prefetch reader: bytes of files below TS_MMAP_THRESHOLD, None for the mapped ones."""
+    return read_bytes(path, TS_MMAP_THRESHOLD)
+
+def scan_typescript_file(path: Path, data: bytes = None):
+    """scan_typescript for a file, or its prefetched bytes; None if it cannot be read.
+    
+    Sources are scanned as bytes, skipping the decode. Large files (bundles,
+    generated code) are memory-mapped, so memory holds the pages being
+    matched and one chunk of code rather than the whole file.
+    """
+    try:
+        if data is not None:
+            return scan_typescript(data)
+        if path.stat().st_size < TS_MMAP_THRESHOLD:
+            return scan_typescript(path.read_bytes())
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return scan_typescript(view)
+    except (OSError, ValueError, RecursionError):
+        return None
+
+def check_typescript_coverage(project_path: Path, sources: dict = None, cache: CoverageCache = None,
+                              index: CoverageIndex = None) -> dict:
     """Check TypeScript type coverage."""
     issues = []
     passed = []
     stats = {'any_count': 0, 'untyped_functions': 0, 'total_functions': 0}
     
-    ts_files = list(project_path.rglob("*.ts")) + list(project_path.rglob("*.tsx"))
-    ts_files = [f for f in ts_files if 'node_modules' not in str(f) and '.d.ts' not in str(f)]
+    sources = sources if sources is not None else walk_sources(project_path)
+    ts_files = sources['.ts'] + sources['.tsx']
     
     if not ts_files:
         return {'type': 'typescript', 'files': 0, 'passed': [], 'issues': ["[!] No TypeScript files found"], 'stats': stats}
     
-    for file_path in ts_files[:30]:  # Limit
-        try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            
-            # Count 'any' usage
-            any_matches = re.findall(r':\s*any\b', content)
-            stats['any_count'] += len(any_matches)
-            
-            # Find functions without return types
-            # function name(params) { - no return type
-            untyped = re.findall(r'function\s+\w+\s*\([^)]*\)\s*{', content)
-            # Arrow functions without types: const fn = (x) => or (x) =>
-            untyped += re.findall(r'=\s*\([^:)]*\)\s*=>', content)
-            stats['untyped_functions'] += len(untyped)
-            
-            # Count typed functions
-            typed = re.findall(r'function\s+\w+\s*\([^)]*\)\s*:\s*\w+', content)
-            typed += re.findall(r':\s*\([^)]*\)\s*=>\s*\w+', content)
-            stats['total_functions'] += len(typed) + len(untyped)
-            
-        except Exception:
+    cached, stale = cache.split(ts_files, TS_ANALYSER_VERSION) if cache else ({}, ts_files)
+    fresh = (scan_typescript_file(path, data) for path, data in prefetch(stale, read_typescript))
+    for file_path, counts in _with_fresh(cached, stale, fresh, cache):
+        if counts is None:
             continue
+        if index:
+            index.add('typescript', file_path, counts)
+        stats['any_count'] += counts['any_count']
+        stats['untyped_functions'] += counts['untyped_functions']
+        stats['total_functions'] += counts['typed_functions'] + counts['untyped_functions']
     
     # Analyze results
     if stats['any_count'] == 0:
@@ -71,37 +545,132 @@ def check_typescript_coverage(project_path: Path) -> dict:
     
     return {'type': 'typescript', 'files': len(ts_files), 'passed': passed, 'issues': issues, 'stats': stats}
 
-def check_python_coverage(project_path: Path) -> dict:
+# Per-module counts produced by analyse_python; check_python_coverage sums them
+PY_COUNTS = ('typed_functions', 'untyped_functions', 'params', 'annotated_params',
+             'annotated_returns', 'any_count')
+PY_POOL_MIN_FILES = 64  # below this, starting worker processes costs more than it saves
+PY_POOL_CHUNK = 16
+PY_POOL_AHEAD = 4  # batches queued per worker
+PY_LEAST_TYPED = 5
+
+def _count_any(annotation) -> int:
+    """Occurrences of `Any` / `typing.Any` in an annotation, including string annotations."""
+    count = 0
+    for node in ast.walk(annotation):
+        if isinstance(node, ast.Name) and node.id == 'Any':
+            count += 1
+        elif isinstance(node, ast.Attribute) and node.attr == 'Any':
+            count += 1
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            try:
+                count += _count_any(ast.parse(node.value, mode='eval'))
+            except SyntaxError:
+                pass
+    return count
+
+def analyse_python(source: str) -> dict:
+    """Count annotated parameters and returns per function of one module.
+    
+    `self`/`cls` of methods are not parameters to annotate; a function is typed
+    when it annotates any parameter or its return.
+    """
+    tree = ast.parse(source)
+    counts = dict.fromkeys(PY_COUNTS, 0)
+    bound = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and not any(
+                        isinstance(d, ast.Name) and d.id == 'staticmethod' for d in item.decorator_list):
+                    bound.add(item)
+        elif isinstance(node, ast.AnnAssign):
+            counts['any_count'] += _count_any(node.annotation)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            args = node.args
+            params = args.posonlyargs + args.args
+            if node in bound and params:
+                params = params[1:]
+            params += args.kwonlyargs + [a for a in (args.vararg, args.kwarg) if a]
+            annotations = [p.annotation for p in params if p.annotation is not None]
+            if node.returns is not None:
+                annotations.append(node.returns)
+                counts['annotated_returns'] += 1
+            counts['params'] += len(params)
+            counts['annotated_params'] += len(annotations) - (node.returns is not None)
+            counts['typed_functions' if annotations else 'untyped_functions'] += 1
+            counts['any_count'] += sum(_count_any(a) for a in annotations)
+    return counts
+
+def analyse_python_source(source: bytes):
+    """analyse_python for prefetched bytes; None if the file was unreadable or does not parse."""
+    if source is None:
+        return None
+    try:
+        return analyse_python(source)
+    except (SyntaxError, ValueError, RecursionError):
+        return None
+
+def analyse_python_batch(sources: list) -> list:
+    """Pool worker entry point: one batch of sources per task keeps IPC overhead down."""
+    return [analyse_python_source(source) for source in sources]
+
+def iter_python_analyses(paths: list):
+    """Yield analyse_python_source results in path order.
+    
+    Files are read ahead by prefetch(); on machines with several CPUs and
+    large trees the parsing runs in a process pool, fed batch by batch with
+    at most PY_POOL_AHEAD batches per worker outstanding.
+    """
+    sources = (data for _, data in prefetch(paths))
+    workers = os.cpu_count() or 1
+    if workers == 1 or len(paths) < PY_POOL_MIN_FILES:
+        yield from map(analyse_python_source, sources)
+        return
+    # Imported here: it costs more than a warm-cache run itself
+    from concurrent.futures import ProcessPoolExecutor
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = [data for _, data in zip(range(PY_POOL_CHUNK), sources)]
+            if batch:
+                pending.append(pool.submit(analyse_python_batch, batch))
+            if pending and (not batch or len(pending) >= workers * PY_POOL_AHEAD):
+                yield from pending.popleft().result()
+            elif not batch:
+                return
+
+def check_python_coverage(project_path: Path, sources: dict = None, cache: CoverageCache = None,
+                          index: CoverageIndex = None) -> dict:
     """Check Python type hints coverage."""
     issues = []
     passed = []
-    stats = {'untyped_functions': 0, 'typed_functions': 0, 'any_count': 0}
+    stats = dict.fromkeys(PY_COUNTS, 0)
+    stats['unparsed'] = 0
     
-    py_files = list(project_path.rglob("*.py"))
-    py_files = [f for f in py_files if not any(x in str(f) for x in ['venv', '__pycache__', '.git', 'node_modules'])]
+    sources = sources if sources is not None else walk_sources(project_path)
+    py_files = sources['.py']
     
     if not py_files:
         return {'type': 'python', 'files': 0, 'passed': [], 'issues': ["[!] No Python files found"], 'stats': stats}
     
-    for file_path in py_files[:30]:  # Limit
-        try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            
-            # Count Any usage
-            any_matches = re.findall(r':\s*Any\b', content)
-            stats['any_count'] += len(any_matches)
-            
-            # Find functions with type hints
-            typed_funcs = re.findall(r'def\s+\w+\s*\([^)]*:[^)]+\)', content)
-            typed_funcs += re.findall(r'def\s+\w+\s*\([^)]*\)\s*->', content)
-            stats['typed_functions'] += len(typed_funcs)
-            
-            # Find functions without type hints
-            all_funcs = re.findall(r'def\s+\w+\s*\(', content)
-            stats['untyped_functions'] += len(all_funcs) - len(typed_funcs)
-            
-        except Exception:
+    # Fold each module in as it arrives; only the least typed few are kept
+    cached, stale = cache.split(py_files, PY_ANALYSER_VERSION) if cache else ({}, py_files)
+    least_typed = []
+    for file_path, counts in _with_fresh(cached, stale, iter_python_analyses(stale), cache):
+        if counts is None:
+            stats['unparsed'] += 1
             continue
+        if index:
+            index.add('python', file_path, counts)
+        for key in PY_COUNTS:
+            stats[key] += counts[key]
+        functions = counts['typed_functions'] + counts['untyped_functions']
+        if functions:
+            entry = (counts['untyped_functions'] / functions, str(file_path))
+            if len(least_typed) < PY_LEAST_TYPED:
+                heapq.heappush(least_typed, entry)
+            else:
+                heapq.heappushpop(least_typed, entry)
     
     total = stats['typed_functions'] + stats['untyped_functions']
     
@@ -113,6 +682,13 @@ def check_python_coverage(project_path: Path) -> dict:
             issues.append(f"[!] Type hints coverage: {typed_ratio:.0f}%")
         else:
             issues.append(f"[X] Type hints coverage: {typed_ratio:.0f}% (add type hints)")
+        if typed_ratio < 70:
+            worst = sorted(least_typed, reverse=True)
+            issues.append("[!] Least typed: " + ", ".join(
+                f"{Path(path).relative_to(project_path)} ({(1 - untyped) * 100:.0f}%)" for untyped, path in worst))
+        params = f"{stats['annotated_params'] / stats['params'] * 100:.0f}%" if stats['params'] else "n/a"
+        passed.append(f"[OK] Annotated: {params} of parameters, "
+                      f"{stats['annotated_returns'] / total * 100:.0f}% of returns")
     
     if stats['any_count'] == 0:
         passed.append("[OK] No 'Any' types found")
@@ -121,13 +697,25 @@ def check_python_coverage(project_path: Path) -> dict:
     else:
         issues.append(f"[X] {stats['any_count']} 'Any' types found")
     
+    if stats['unparsed']:
+        issues.append(f"[!] {stats['unparsed']} Python files could not be parsed")
+    
     passed.append(f"[OK] Analyzed {len(py_files)} Python files")
     
     return {'type': 'python', 'files': len(py_files), 'passed': passed, 'issues': issues, 'stats': stats}
 
 def main():
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    project_path = Path(target)
+    parser = argparse.ArgumentParser(description="Measure TypeScript/Python type coverage.")
+    parser.add_argument("target", nargs="?", default=".")
+    parser.add_argument("--no-cache", action="store_true", help="re-analyse every file, keep no per-file cache")
+    parser.add_argument("--since", metavar="REF",
+                        help="re-analyse only files changed since REF; the rest comes from the cache")
+    parser.add_argument("--index", metavar="FILE",
+                        help=f"per-file/per-directory JSON Lines index (default: <target>/{STATE_DIR}/{INDEX_FILE})")
+    args = parser.parse_args()
+    project_path = Path(args.target).resolve()
+    cache = None if args.no_cache else CoverageCache(project_path)
+    index = CoverageIndex(project_path, Path(args.index) if args.index else None)
     
     print("\n" + "=" * 60)
     print("  TYPE COVERAGE CHECKER")
@@ -135,16 +723,37 @@ def main():
     
     results = []
     
+    # One pruned walk feeds both checkers; --since replaces it with the changed files
+    sources = None
+    head = git_head(project_path) if cache else None
+    if args.since:
+        changed = git_changed_files(project_path, args.since)
+        # The cache may predate REF: what changed since it was saved counts too
+        since_cache = git_changed_files(project_path, cache.commit) if cache and cache.commit else None
+        if changed is None:
+            print(f"[!] git could not diff against {args.since}: analysing the whole tree")
+        elif not cache or not cache.entries or since_cache is None:
+            print("[!] No cached results from a known commit to merge: analysing the whole tree")
+        else:
+            sources = changed_sources(project_path, sorted(set(changed) | set(since_cache)), cache)
+            print(f"Scope: {len(changed)} files changed since {args.since}, others from the cache")
+    if sources is None:
+        sources = walk_sources(project_path)
+    
     # Check TypeScript
-    ts_result = check_typescript_coverage(project_path)
+    ts_result = check_typescript_coverage(project_path, sources, cache, index)
     if ts_result['files'] > 0:
         results.append(ts_result)
     
     # Check Python
-    py_result = check_python_coverage(project_path)
+    py_result = check_python_coverage(project_path, sources, cache, index)
     if py_result['files'] > 0:
         results.append(py_result)
     
+    if cache:
+        cache.save(head)
+    index.close()
+    
     if not results:
         print("[!] No TypeScript or Python files found.")
         sys.exit(0)
@@ -161,6 +770,16 @@ def main():
             if item.startswith("[X]"):
                 critical_issues += 1
     
+    if index.previous:
+        regressed = [entry for entry in index.trend if entry[0] < 0]
+        print(f"\n[TREND] vs previous index: {len(regressed)} directories regressed, "
+              f"{len(index.trend) - len(regressed)} improved")
+        for delta, lang, directory, before, after in regressed[:TREND_SHOWN]:
+            print(f"  [!] {lang} {directory}: {before:.0f}% -> {after:.0f}% ({delta:+.1f})")
+    
+    if cache and cache.hits + cache.misses:
+        print(f"\n  Cache: reused {cache.hits}/{cache.hits + cache.misses} file results")
+    
     print("\n" + "=" * 60)
     if critical_issues == 0:
         print("[OK] TYPE COVERAGE: ACCEPTABLE")